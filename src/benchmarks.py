@@ -0,0 +1,103 @@
+"""
+Benchmarks of the scalar arithmetic with and without gmpy2:
+python -m src.benchmarks
+"""
+
+from time import perf_counter
+import os
+
+from fastecdsa.curve import secp256k1
+
+from .utils import backend
+from .utils.utils import ModP, mod_hash
+from .utils.commitments import commitment
+from .utils.elliptic_curve_hash import elliptic_hash
+from .utils.power_vectors import RangePowers
+from .utils.scalar_vector import ScalarVector
+from .rangeproofs.rangeproof_aggreg_prover import AggregNIRangeProver
+from .rangeproofs.rangeproof_aggreg_verifier import AggregRangeVerifier
+
+CURVE = secp256k1
+p = CURVE.q
+REPEAT = 20
+
+
+def best_time(f, repeat=REPEAT):
+    """Returns the best time of repeat calls to f, in milliseconds"""
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        f()
+        times.append(perf_counter() - start)
+    return 1000 * min(times)
+
+
+def bench_scalars():
+    x = mod_hash(os.urandom(10), p)
+    e = mod_hash(os.urandom(10), p).x
+    return {
+        "ModP ** e": best_time(lambda: x ** e, 200),
+        "ModP.inv": best_time(lambda: x.inv(), 200),
+    }
+
+
+def bench_range_proof(n, m):
+    seeds = [os.urandom(10) for _ in range(7)]
+    gs = [elliptic_hash(str(i).encode() + seeds[0], CURVE) for i in range(n * m)]
+    hs = [elliptic_hash(str(i).encode() + seeds[1], CURVE) for i in range(n * m)]
+    g = elliptic_hash(seeds[2], CURVE)
+    h = elliptic_hash(seeds[3], CURVE)
+    u = elliptic_hash(seeds[4], CURVE)
+    vs = [ModP(i, p) for i in range(m)]
+    gammas = [mod_hash(seeds[5] + bytes([i]), p) for i in range(m)]
+    Vs = [commitment(g, h, vs[i], gammas[i]) for i in range(m)]
+    Prov = AggregNIRangeProver(vs, n, g, h, gs, hs, gammas, u, CURVE, seeds[6])
+    proof = Prov.prove()
+
+    aL = []
+    for v in vs:
+        aL += list(map(int, reversed(bin(v.x)[2:].zfill(n))))
+    aL = ScalarVector(aL, p)
+    sL, sR = (
+        ScalarVector([mod_hash(os.urandom(10), p).x for _ in range(n * m)], p)
+        for _ in range(2)
+    )
+    y, z, x, tau1, tau2, alpha, rho = (mod_hash(os.urandom(10), p) for _ in range(7))
+
+    def final_compute():
+        powers = RangePowers(y, z, n, m, p)
+        Prov._final_compute(
+            aL, aL - 1, sL, sR, powers.yn, powers.z2n, powers.zs, z, x, tau1, tau2, alpha, rho
+        )
+
+    def scalar_prep():
+        Verif = AggregRangeVerifier(Vs, g, h, gs, hs, u, proof)
+        Verif.multiexp_terms(ModP(1, p))
+
+    return {
+        "prover _final_compute n={} m={}".format(n, m): best_time(final_compute),
+        "verifier scalar prep n={} m={}".format(n, m): best_time(scalar_prep),
+    }
+
+
+def main():
+    initial = backend.GMPY2
+    backends = ["ints", "gmpy2"] if backend.use_gmpy2(True) else ["ints"]
+    if len(backends) == 1:
+        print("gmpy2 is not installed, only CPython ints are measured")
+    rows = {}
+    for name in backends:
+        backend.use_gmpy2(name == "gmpy2")
+        results = bench_scalars()
+        for n, m in [(64, 1), (64, 8)]:
+            results.update(bench_range_proof(n, m))
+        for row, t in results.items():
+            rows.setdefault(row, []).append(t)
+    backend.use_gmpy2(initial)
+    print(" " * 40 + "".join(name.rjust(12) for name in backends))
+    for row, times in rows.items():
+        print(row.ljust(40) + "".join("{:10.3f}ms".format(t) for t in times))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Contains the in-place folding of the vectors of the inner-product argument"""
+
+from concurrent.futures import Executor
+from itertools import chain, islice
+from operator import mul
+from typing import Optional
+
+from fastecdsa.point import Point
+
+from ..utils.parallel import multiexp_streams
+from ..utils.scalar_vector import ScalarVector
+
+
+def use_deferred_folding(generator_folding: str) -> bool:
+    """Returns whether the generators should be folded in a deferred way for the strategy generator_folding"""
+    if generator_folding not in ("fold", "deferred"):
+        raise Exception("Unknown generator folding " + str(generator_folding))
+    return generator_folding == "deferred"
+
+
+class FoldingEngine:
+    """
+    Holds the vectors g, h, a, b of Protocol 2 in buffers allocated once.
+    Each round folds them in place, so that the current vectors are the first n entries of the buffers,
+    the scalar vectors being folded by ScalarVector.fold.
+
+    If deferred is set, the generators are never folded. Each original generator g_j instead carries
+    the scalar by which it enters the folded generator g'_(j mod n), and L and R are multiexps over
+    the original generators, which can use their fixed-base tables.
+
+    If h_scalars is given, the generators of the argument are h_i^(h_scalars_i). Deferred folding
+    starts from these scalars, while in-place folding computes the rescaled points.
+    """
+
+    def __init__(
+        self, g, h, a: ScalarVector, b: ScalarVector, deferred: bool = False, h_scalars=None
+    ):
+        assert len(g) == len(h) == len(a) == len(b)
+        self.deferred = deferred
+        self.a = ScalarVector(a.reduced(), a.p)
+        self.b = ScalarVector(b.reduced(), b.p)
+        self.p = a.p
+        self.n = len(a)
+        if h_scalars is not None:
+            h_scalars = ScalarVector.from_scalars(h_scalars, self.p).reduced()
+        if deferred:
+            self.g = g
+            self.h = h
+            self.g_scalars = [1] * self.n
+            self.h_scalars = [1] * self.n if h_scalars is None else h_scalars
+        else:
+            self.g = list(g)
+            self.h = list(h) if h_scalars is None else [s * hi for s, hi in zip(h_scalars, h)]
+
+    def commitments(self, u: Point, executor: Optional[Executor] = None):
+        """
+        Returns the points L and R of the current round, computed concurrently on executor if given.
+        The multiexps are streamed over ranges of the buffers, so that no vector is built.
+        """
+        np = self.n // 2
+        n = self.n
+        a, b, p = self.a.xs, self.b.xs, self.p
+        cl = sum(map(mul, islice(a, np), islice(b, np, n))) % p
+        cr = sum(map(mul, islice(a, np, n), islice(b, np))) % p
+        if self.deferred:
+            L_pairs = chain(
+                self._deferred_pairs(self.g, self.g_scalars, a, True),
+                self._deferred_pairs(self.h, self.h_scalars, b, False),
+            )
+            R_pairs = chain(
+                self._deferred_pairs(self.g, self.g_scalars, a, False),
+                self._deferred_pairs(self.h, self.h_scalars, b, True),
+            )
+        else:
+            g, h = self.g, self.h
+            L_pairs = chain(
+                zip(islice(g, np, n), islice(a, np)), zip(islice(h, np), islice(b, np, n))
+            )
+            R_pairs = chain(
+                zip(islice(g, np), islice(a, np, n)), zip(islice(h, np, n), islice(b, np))
+            )
+        L, R = multiexp_streams(executor, [L_pairs, R_pairs])
+        return L + cl * u, R + cr * u
+
+    def _deferred_pairs(self, gs, scalars, xs, high: bool):
+        # g'_(np+i) enters L with a_i and g'_i enters R with a_(np+i), and symmetrically for h'.
+        # Yields the original generators of the folded ones of the high half if high is set,
+        # else of the low half, with their scalar times the entry of xs of the other half.
+        np = self.n // 2
+        mask = self.n - 1
+        p = self.p
+        shift = -np if high else np
+        return (
+            (gj, xs[(j & mask) + shift] * sj % p)
+            for j, (gj, sj) in enumerate(zip(gs, scalars))
+            if (j & mask >= np) == high
+        )
+
+    def fold(self, x: int, x_inv: int):
+        """
+        Folds a into x * a_lo + x_inv * a_hi, b into x_inv * b_lo + x * b_hi,
+        g into x_inv * g_lo + x * g_hi and h into x * h_lo + x_inv * h_hi
+        """
+        np = self.n // 2
+        self.a.fold(x, x_inv)
+        self.b.fold(x_inv, x)
+        if self.deferred:
+            mask = self.n - 1
+            p = self.p
+            g_scalars, h_scalars = self.g_scalars, self.h_scalars
+            for j in range(len(g_scalars)):
+                if j & mask < np:
+                    g_scalars[j] = g_scalars[j] * x_inv % p
+                    h_scalars[j] = h_scalars[j] * x % p
+                else:
+                    g_scalars[j] = g_scalars[j] * x % p
+                    h_scalars[j] = h_scalars[j] * x_inv % p
+        else:
+            g, h = self.g, self.h
+            for i in range(np):
+                g[i] = x_inv * g[i] + x * g[np + i]
+                h[i] = x * h[i] + x_inv * h[np + i]
+        self.n = np
+
+    def final_scalars(self):
+        """Returns the scalars a and b once the vectors are folded to length 1"""
+        assert self.n == 1
+        return self.a[0], self.b[0]
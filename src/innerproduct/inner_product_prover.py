@@ -1,16 +1,34 @@
 """Contains classes for the prover of an inner-product argument"""
 
+from concurrent.futures import Executor
+from time import perf_counter
 from typing import Optional
 
+from .folding import FoldingEngine, use_deferred_folding
 from .inner_product_verifier import Proof1, Proof2
-from ..utils.commitments import vector_commitment
-from ..utils.utils import inner_product
+from ..utils.scalar_vector import ScalarVector
 from ..utils.transcript import Transcript
 
 
 class NIProver:
     """Class simulating a NI prover for the inner-product argument (Protocol 1)"""
-    def __init__(self, g, h, u, P, c, a, b, group, seed=b""):
+    def __init__(
+        self,
+        g,
+        h,
+        u,
+        P,
+        c,
+        a,
+        b,
+        group,
+        seed=b"",
+        legacy_transcript=False,
+        include_transcript=True,
+        generator_folding="deferred",
+        executor: Optional[Executor] = None,
+        h_scalars=None,
+    ):
         assert len(g) == len(h) == len(a) == len(b)
         self.g = g
         self.h = h
@@ -20,12 +38,17 @@ class NIProver:
         self.a = a
         self.b = b
         self.group = group
-        self.transcript = Transcript(seed)
+        self.include_transcript = include_transcript
+        self.generator_folding = generator_folding
+        self.executor = executor
+        self.h_scalars = h_scalars
+        self.transcript = Transcript(seed, legacy_transcript, include_transcript)
 
     def prove(self) -> Proof1:
         """
         Proves the inner-product argument following Protocol 1 in the paper
         Returns a Proof1 object.
+        The time spent in each round of Protocol 2 is recorded in self.timings.
         """
         # x = mod_hash(self.transcript.digest, self.group.order)
         x = self.transcript.get_modp(self.group.q)
@@ -40,14 +63,40 @@ class NIProver:
             self.a,
             self.b,
             self.group,
-            self.transcript.digest,
+            self.transcript,
+            include_transcript=self.include_transcript,
+            generator_folding=self.generator_folding,
+            executor=self.executor,
+            h_scalars=self.h_scalars,
+        )
+        proof2 = Prov2.prove()
+        self.timings = Prov2.timings
+        return Proof1(
+            u_new,
+            P_new,
+            proof2,
+            self.transcript.digest if self.include_transcript else None,
         )
-        return Proof1(u_new, P_new, Prov2.prove(), self.transcript.digest)
 
 
 class FastNIProver2:
     """Class simulating a NI prover for the inner-product argument (Protocol 2)"""
-    def __init__(self, g, h, u, P, a, b, group, transcript: Optional[bytes]=None):
+    def __init__(
+        self,
+        g,
+        h,
+        u,
+        P,
+        a,
+        b,
+        group,
+        transcript: Optional[Transcript] = None,
+        legacy_transcript=False,
+        include_transcript=True,
+        generator_folding="deferred",
+        executor: Optional[Executor] = None,
+        h_scalars=None,
+    ):
         assert len(g) == len(h) == len(a) == len(b)
         assert len(a) & (len(a) - 1) == 0
         self.log_n = len(a).bit_length() - 1
@@ -56,14 +105,18 @@ class FastNIProver2:
         self.h = h
         self.u = u
         self.P = P
-        self.a = a
-        self.b = b
+        self.a = ScalarVector.from_scalars(a, group.q)
+        self.b = ScalarVector.from_scalars(b, group.q)
         self.group = group
-        self.transcript = Transcript()
-        if transcript:
-            self.transcript.digest += transcript
-            self.init_transcript_length = len(transcript.split(b"&"))
+        self.include_transcript = include_transcript
+        self.generator_folding = generator_folding
+        self.executor = executor
+        self.h_scalars = h_scalars
+        if transcript is not None:
+            self.transcript = transcript.fork()
+            self.init_transcript_length = len(transcript.digest.split(b"&"))
         else:
+            self.transcript = Transcript(legacy=legacy_transcript)
             self.init_transcript_length = 1
 
 
@@ -71,40 +124,58 @@ class FastNIProver2:
         """
         Proves the inner-product argument following Protocol 2 in the paper
         Returns a Proof2 object.
+        The time spent in each round is recorded in self.timings.
+        generator_folding selects how the generators are folded: "fold" folds them every round,
+        and "deferred", the default, tracks them as scalar combinations of the original ones.
+        Deferred folding is faster at every size measured, with or without fixed-base tables.
+        If an executor is given, L and R are computed concurrently on it.
+        If h_scalars is given, the argument is over the generators h_i^(h_scalars_i), so that
+        deferred folding can run on the fixed-base tables of h.
         """
-        gp = self.g
-        hp = self.h
-        ap = self.a
-        bp = self.b
+        engine = FoldingEngine(
+            self.g,
+            self.h,
+            self.a,
+            self.b,
+            use_deferred_folding(self.generator_folding),
+            self.h_scalars,
+        )
 
         xs = []
         Ls = []
         Rs = []
+        self.timings = []
 
-        while True:
-            if len(ap) == len(bp) == len(gp) == len(hp) == 1:
-                return Proof2(
-                    ap[0],
-                    bp[0],
-                    xs,
-                    Ls,
-                    Rs,
-                    self.transcript.digest,
-                    self.init_transcript_length,
-                )
-            np = len(ap) // 2
-            cl = inner_product(ap[:np], bp[np:])
-            cr = inner_product(ap[np:], bp[:np])
-            L = vector_commitment(gp[np:], hp[:np], ap[:np], bp[np:]) + cl * self.u
-            R = vector_commitment(gp[:np], hp[np:], ap[np:], bp[:np]) + cr * self.u
+        while engine.n > 1:
+            start = perf_counter()
+            L, R = engine.commitments(self.u, self.executor)
             Ls.append(L)
             Rs.append(R)
+            committed = perf_counter()
             self.transcript.add_list_points([L, R])
             # x = mod_hash(self.transcript.digest, self.group.order)
             x = self.transcript.get_modp(self.group.q)
             xs.append(x)
             self.transcript.add_number(x)
-            gp = [x.inv() * gi_fh + x * gi_sh for gi_fh, gi_sh in zip(gp[:np], gp[np:])]
-            hp = [x * hi_fh + x.inv() * hi_sh for hi_fh, hi_sh in zip(hp[:np], hp[np:])]
-            ap = [x * ai_fh + x.inv() * ai_sh for ai_fh, ai_sh in zip(ap[:np], ap[np:])]
-            bp = [x.inv() * bi_fh + x * bi_sh for bi_fh, bi_sh in zip(bp[:np], bp[np:])]
+            x_inv = x.inv()
+            challenged = perf_counter()
+            engine.fold(x.x, x_inv.x)
+            self.timings.append(
+                {
+                    "n": 2 * engine.n,
+                    "commitments": committed - start,
+                    "challenge": challenged - committed,
+                    "fold": perf_counter() - challenged,
+                }
+            )
+
+        a, b = engine.final_scalars()
+        return Proof2(
+            a,
+            b,
+            xs,
+            Ls,
+            Rs,
+            self.transcript.digest if self.include_transcript else None,
+            self.init_transcript_length,
+        )
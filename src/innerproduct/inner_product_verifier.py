@@ -1,8 +1,13 @@
 """Contains classes for the prover of an inner-product argument"""
 
+from typing import Optional
+
 from fastecdsa.curve import secp256k1, Curve
-from ..utils.utils import mod_hash, point_to_b64, ModP
-from ..pippenger import PipSECP256k1
+from ..utils.utils import mod_hash, point_to_b64, ModP, batch_inverse
+from ..utils.power_vectors import s_vector
+from ..utils.serialization import Reader, encode_point, encode_scalar, encode_uint
+from ..utils.transcript import Transcript, seed_of
+from ..pippenger import MultiexpSECP256k1
 
 SUPERCURVE: Curve = secp256k1
 
@@ -16,17 +21,56 @@ class Proof1:
         self.proof2 = proof2
         self.transcript = transcript
 
+    def to_bytes(self) -> bytes:
+        """
+        Returns the binary encoding u_new || P_new || proof2 || len(transcript) || transcript
+        with 33 bytes compressed points and 4 bytes lengths.
+        A transcript-free proof is encoded as proof2 only, u_new and P_new being recomputed by the verifier.
+        """
+        if self.transcript is None:
+            return self.proof2.to_bytes()
+        return b"".join(
+            [
+                encode_point(self.u_new),
+                encode_point(self.P_new),
+                self.proof2.to_bytes(),
+                encode_uint(len(self.transcript), 4),
+                self.transcript,
+            ]
+        )
+
+    @classmethod
+    def from_bytes(cls, data, with_transcript: bool = True) -> "Proof1":
+        """Decodes a proof encoded by to_bytes from a bytes-like object"""
+        reader = Reader(data)
+        proof = cls.read(reader, with_transcript)
+        reader.end()
+        return proof
+
+    @classmethod
+    def read(cls, reader: Reader, with_transcript: bool = True) -> "Proof1":
+        """Reads a proof encoded by to_bytes from a Reader"""
+        if not with_transcript:
+            return cls(None, None, Proof2.read(reader, with_transcript), None)
+        u_new = reader.point()
+        P_new = reader.point()
+        proof2 = Proof2.read(reader)
+        transcript = bytes(reader.read(reader.uint(4)))
+        return cls(u_new, P_new, proof2, transcript)
+
 
 class Verifier1:
     """Verifier class for Protocol 1"""
 
-    def __init__(self, g, h, u, P, c, proof1):
+    def __init__(self, g, h, u, P, c, proof1, legacy_transcript=False):
         self.g = g
         self.h = h
         self.u = u
         self.P = P
         self.c = c
         self.proof1 = proof1
+        self.legacy_transcript = legacy_transcript
+        self.transcript = None
 
     def assertThat(self, expr: bool):
         """Assert that expr is truthy else raise exception"""
@@ -35,25 +79,63 @@ class Verifier1:
 
     def verify_transcript(self):
         """Verify a transcript to assure Fiat-Shamir was done properly"""
+        if self.proof1.transcript is None:
+            # Transcript-free proof, the challenge is recomputed
+            self.transcript = Transcript()
+            self.x = self.transcript.get_modp(SUPERCURVE.q)
+            self.transcript.add_number(self.x)
+            return
         lTranscript = self.proof1.transcript.split(b"&")
-        self.assertThat(
-            lTranscript[1]
-            == str(mod_hash(b"&".join(lTranscript[:1]) + b"&", SUPERCURVE.q)).encode()
+        if self.legacy_transcript:
+            self.assertThat(
+                lTranscript[1]
+                == str(mod_hash(b"&".join(lTranscript[:1]) + b"&", SUPERCURVE.q)).encode()
+            )
+            self.x = ModP(int(lTranscript[1]), SUPERCURVE.q)
+            return
+        seed = seed_of(self.proof1.transcript)
+        self.assertThat(seed is not None)
+        self.transcript = Transcript(seed)
+        self.x = self.transcript.get_modp(SUPERCURVE.q)
+        self.transcript.add_number(self.x)
+        # The carried transcript is not read but must be the replayed one byte for byte
+        self.assertThat(self.proof1.transcript == self.transcript.digest)
+
+    def _verifier2(self, u_new, P_new):
+        return Verifier2(
+            self.g,
+            self.h,
+            u_new,
+            P_new,
+            self.proof1.proof2,
+            self.transcript,
+            self.legacy_transcript,
         )
 
+    def multiexp_terms(self):
+        """
+        Verifies the transcript and returns (g_scalars, h_scalars, u_scalar, points, scalars)
+        such that the proof is valid iff g^g_scalars * h^h_scalars * u^u_scalar * points^scalars == P.
+        u_new and P_new are not read from the proof but folded into the scalars.
+        """
+        self.verify_transcript()
+
+        Verif2 = self._verifier2(self.proof1.u_new, self.proof1.P_new)
+        g_scalars, h_scalars, u_scalar, points, scalars = Verif2.multiexp_terms()
+        return g_scalars, h_scalars, self.x * (u_scalar - self.c), points, scalars
+
     def verify(self):
         """Verifies the proof given by a prover. Raises an execption if it is invalid"""
         self.verify_transcript()
 
-        lTranscript = self.proof1.transcript.split(b"&")
-        x = lTranscript[1]
-        x = ModP(int(x), SUPERCURVE.q)
-        self.assertThat(self.proof1.P_new == self.P + (x * self.c) * self.u)
-        self.assertThat(self.proof1.u_new == x * self.u)
+        x = self.x
+        P_new = self.P + (x * self.c) * self.u
+        u_new = x * self.u
+        if self.proof1.transcript is not None:
+            self.assertThat(self.proof1.P_new == P_new)
+            self.assertThat(self.proof1.u_new == u_new)
 
-        Verif2 = Verifier2(
-            self.g, self.h, self.proof1.u_new, self.proof1.P_new, self.proof1.proof2
-        )
+        Verif2 = self._verifier2(u_new, P_new)
 
         return Verif2.verify()
 
@@ -72,16 +154,76 @@ class Proof2:
             start_transcript
         )  # Start of transcript to be used if Protocol 2 is run in Protocol 1
 
+    def to_bytes(self) -> bytes:
+        """
+        Returns the binary encoding a || b || k || xs || Ls || Rs || start_transcript || len(transcript) || transcript
+        with 32 bytes scalars, 33 bytes compressed points, k = len(Ls) on 1 byte and 4 bytes integers.
+        A transcript-free proof is encoded as a || b || k || Ls || Rs, xs being recomputed by the verifier.
+        """
+        if self.transcript is None:
+            return b"".join(
+                [encode_scalar(self.a), encode_scalar(self.b), encode_uint(len(self.Ls), 1)]
+                + [encode_point(L) for L in self.Ls]
+                + [encode_point(R) for R in self.Rs]
+            )
+        return b"".join(
+            [encode_scalar(self.a), encode_scalar(self.b), encode_uint(len(self.xs), 1)]
+            + [encode_scalar(x) for x in self.xs]
+            + [encode_point(L) for L in self.Ls]
+            + [encode_point(R) for R in self.Rs]
+            + [
+                encode_uint(self.start_transcript, 4),
+                encode_uint(len(self.transcript), 4),
+                self.transcript,
+            ]
+        )
+
+    @classmethod
+    def from_bytes(cls, data, with_transcript: bool = True) -> "Proof2":
+        """Decodes a proof encoded by to_bytes from a bytes-like object"""
+        reader = Reader(data)
+        proof = cls.read(reader, with_transcript)
+        reader.end()
+        return proof
+
+    @classmethod
+    def read(cls, reader: Reader, with_transcript: bool = True) -> "Proof2":
+        """Reads a proof encoded by to_bytes from a Reader"""
+        a = reader.scalar(SUPERCURVE.q)
+        b = reader.scalar(SUPERCURVE.q)
+        k = reader.uint(1)
+        if not with_transcript:
+            Ls = [reader.point() for _ in range(k)]
+            Rs = [reader.point() for _ in range(k)]
+            return cls(a, b, None, Ls, Rs, None)
+        xs = [reader.scalar(SUPERCURVE.q) for _ in range(k)]
+        Ls = [reader.point() for _ in range(k)]
+        Rs = [reader.point() for _ in range(k)]
+        start_transcript = reader.uint(4)
+        transcript = bytes(reader.read(reader.uint(4)))
+        return cls(a, b, xs, Ls, Rs, transcript, start_transcript)
+
 
 class Verifier2:
     """Verifier class for Protocol 2"""
 
-    def __init__(self, g, h, u, P, proof: Proof2):
+    def __init__(
+        self,
+        g,
+        h,
+        u,
+        P,
+        proof: Proof2,
+        transcript: Optional[Transcript] = None,
+        legacy_transcript=False,
+    ):
         self.g = g
         self.h = h
         self.u = u
         self.P = P
         self.proof = proof
+        self.transcript = transcript
+        self.legacy_transcript = legacy_transcript
 
     def assertThat(self, expr):
         """Assert that expr is truthy else raise exception"""
@@ -90,16 +232,7 @@ class Verifier2:
 
     def get_ss(self, xs):
         """See page 15 in paper"""
-        n = len(self.g)
-        log_n = n.bit_length() - 1
-        ss = []
-        for i in range(1, n + 1):
-            tmp = ModP(1, SUPERCURVE.q)
-            for j in range(0, log_n):
-                b = 1 if bin(i - 1)[2:].zfill(log_n)[j] == "1" else -1
-                tmp *= xs[j] if b == 1 else xs[j].inv()
-            ss.append(tmp)
-        return ss
+        return list(s_vector(xs, SUPERCURVE.q))
 
     def verify_transcript(self):
         """Verify a transcript to assure Fiat-Shamir was done properly"""
@@ -109,6 +242,31 @@ class Verifier2:
         Ls = self.proof.Ls
         Rs = self.proof.Rs
         xs = self.proof.xs
+        if self.proof.transcript is None or not self.legacy_transcript:
+            # The challenges are recomputed from the transcript of Protocol 1, if any,
+            # and checked against the proof unless it is transcript-free
+            transcript = (
+                self.transcript.fork() if self.transcript is not None else Transcript()
+            )
+            self.assertThat(len(Ls) == len(Rs) == log_n)
+            self.xs = []
+            for i in range(log_n):
+                transcript.add_list_points([Ls[i], Rs[i]])
+                x = transcript.get_modp(SUPERCURVE.q)
+                transcript.add_number(x)
+                self.xs.append(x)
+            if self.proof.transcript is not None:
+                # The challenges, the carried transcript and its start must be the replayed ones
+                start = (
+                    len(self.transcript.digest.split(b"&"))
+                    if self.transcript is not None
+                    else 1
+                )
+                self.assertThat(xs == self.xs)
+                self.assertThat(self.proof.transcript == transcript.digest)
+                self.assertThat(init_len == start)
+            return
+        self.xs = xs
         lTranscript = self.proof.transcript.split(b"&")
         for i in range(log_n):
             self.assertThat(lTranscript[init_len + i * 3] == point_to_b64(Ls[i]))
@@ -124,24 +282,33 @@ class Verifier2:
                 ).encode()
             )
 
-    def verify(self):
-        """Verifies the proof given by a prover. Raises an execption if it is invalid"""
+    def multiexp_terms(self):
+        """
+        Verifies the transcript and returns (g_scalars, h_scalars, u_scalar, points, scalars)
+        such that the proof is valid iff g^g_scalars * h^h_scalars * u^u_scalar * points^scalars == P
+        """
         self.verify_transcript()
 
         proof = self.proof
-        Pip = PipSECP256k1
-        ss = self.get_ss(self.proof.xs)
-        LHS = Pip.multiexp(
-            self.g + self.h + [self.u],
-            [proof.a * ssi for ssi in ss]
-            + [proof.b * ssi.inv() for ssi in ss]
-            + [proof.a * proof.b],
-        )
-        RHS = self.P + Pip.multiexp(
+        ss = self.get_ss(self.xs)
+        xs_inv = batch_inverse(self.xs)
+        # The inverse of s_i is s_(n-1-i)
+        return (
+            [proof.a * ssi for ssi in ss],
+            [proof.b * ssi_inv for ssi_inv in reversed(ss)],
+            proof.a * proof.b,
             proof.Ls + proof.Rs,
-            [xi ** 2 for xi in proof.xs] + [xi.inv() ** 2 for xi in proof.xs],
+            [-(xi ** 2) for xi in self.xs] + [-(xi_inv ** 2) for xi_inv in xs_inv],
+        )
+
+    def verify(self):
+        """Verifies the proof given by a prover. Raises an execption if it is invalid"""
+        g_scalars, h_scalars, u_scalar, points, scalars = self.multiexp_terms()
+        LHS = MultiexpSECP256k1.multiexp(
+            self.g + self.h + [self.u] + points,
+            g_scalars + h_scalars + [u_scalar] + scalars,
         )
 
-        self.assertThat(LHS == RHS)
+        self.assertThat(LHS == self.P)
         print("OK")
         return True
@@ -49,3 +49,10 @@ Prov = AggregNIRangeProver(vs, n, g, h, gs, hs, gammas, u, CURVE, seeds[6])
 proof = Prov.prove()
 Verif = AggregRangeVerifier(Vs, g, h, gs, hs, u, proof)
 Verif.verify()
+
+for t in Prov.timings:
+    print(
+        "n = {n}: commitments {commitments:.3f}s, challenge {challenge:.3f}s, fold {fold:.3f}s".format(
+            **t
+        )
+    )
@@ -1,7 +1,54 @@
 from fastecdsa.curve import secp256k1
+import os
+import secrets
 from .pippenger import Pippenger
-from .group import EC
+from .group import EC, ECJacobian
+from .glv import GLVPippenger
+from .multiexp import MultiexpDispatcher
 
-PipSECP256k1 = Pippenger(EC(secp256k1))
+PipSECP256k1 = GLVPippenger(ECJacobian(secp256k1))
 
-__all__ = ["Pippenger", "EC", "PipSECP256k1"]
\ No newline at end of file
+# Crossovers stored by autotune_secp256k1 and loaded by load_tuning_secp256k1.
+# They are loaded when the module is imported only if BULLETPROOFS_MULTIEXP_TUNING is set,
+# so that the engines used never depend on a file left on the host otherwise.
+TUNING_PATH = os.environ.get(
+    "BULLETPROOFS_MULTIEXP_TUNING",
+    os.path.join(
+        os.path.expanduser("~"), ".cache", "python-bulletproofs", "multiexp-secp256k1.json"
+    ),
+)
+
+# Native scalar multiplication is the fastest for one point and Straus' method up to about 32 points
+MultiexpSECP256k1 = MultiexpDispatcher(
+    PipSECP256k1, [(1, "naive"), (32, "straus"), (None, "pippenger")]
+)
+
+
+def autotune_secp256k1(path=TUNING_PATH):
+    """Benchmarks the multiexp engines on this host and stores the crossovers in path"""
+    gs = [secrets.randbelow(secp256k1.q) * secp256k1.G for _ in range(256)]
+    crossovers = MultiexpSECP256k1.autotune(gs)
+    MultiexpSECP256k1.save(path)
+    return crossovers
+
+
+def load_tuning_secp256k1(path=TUNING_PATH):
+    """Loads the crossovers stored by autotune_secp256k1. Returns whether they were loaded"""
+    return MultiexpSECP256k1.load(path)
+
+
+if "BULLETPROOFS_MULTIEXP_TUNING" in os.environ:
+    load_tuning_secp256k1()
+
+
+__all__ = [
+    "Pippenger",
+    "EC",
+    "ECJacobian",
+    "GLVPippenger",
+    "MultiexpDispatcher",
+    "PipSECP256k1",
+    "MultiexpSECP256k1",
+    "autotune_secp256k1",
+    "load_tuning_secp256k1",
+]
@@ -0,0 +1,52 @@
+from fastecdsa.curve import secp256k1
+
+from .group import ECJacobian
+from .pippenger import Pippenger
+
+# secp256k1 has the endomorphism (x, y) -> (BETA * x, y), which multiplies points by LAMBDA
+BETA = 0x7AE96A2B657C07106E64479EAC3434E99CF0497512F58995C1396C28719501EE
+LAMBDA = 0x5363AD4CC05C30E0A5261C028812645A122E22EA20816678DF02967C1B23BD72
+# Short basis (A1, B1), (A2, B2) of the lattice of the (k1, k2) with k1 + k2 * LAMBDA = 0 mod q
+A1 = 0x3086D221A7D46BCDE86C90E49284EB15
+B1 = -0xE4437ED6010E88286F547FA90ABFE4C3
+A2 = 0x114CA50F7A8E2F3F657C1108D9D44CFD8
+B2 = A1
+
+
+def glv_decompose(k):
+    """Returns (k1, k2) of about 128 bits each, possibly negative, such that k = k1 + k2 * LAMBDA mod q"""
+    q = secp256k1.q
+    c1 = (B2 * k + q // 2) // q
+    c2 = (-B1 * k + q // 2) // q
+    k1 = k - c1 * A1 - c2 * A2
+    k2 = -c1 * B1 - c2 * B2
+    return k1, k2
+
+
+class GLVPippenger(Pippenger):
+    """
+    Pippenger instance for secp256k1 in Jacobian coordinates in which every exponent of the
+    bucket method is split into two halves with the GLV endomorphism. The multiexp of N elements
+    becomes one of 2N elements with half-length exponents, so the number of windows is halved.
+    Fixed-base tables are used as is. The split is also used by the dispatcher's Straus engine.
+    """
+
+    def __init__(self, group: ECJacobian, table_window=4):
+        assert group.curve is secp256k1
+        Pippenger.__init__(self, group, table_window)
+
+    def split(self, gs, es):
+        G = self.G
+        p = G.p
+        split_gs, split_es = [], []
+        for g, e in zip(gs, es):
+            k1, k2 = glv_decompose(e)
+            if k1:
+                split_gs.append(g if k1 > 0 else G.neg(g))
+                split_es.append(abs(k1))
+            if k2:
+                X, Y, Z = g
+                g2 = (BETA * X % p, Y, Z)
+                split_gs.append(g2 if k2 > 0 else G.neg(g2))
+                split_es.append(abs(k2))
+        return split_gs, split_es
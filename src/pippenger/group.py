@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from .modp import ModP
 from fastecdsa.curve import Curve
+from fastecdsa.point import Point
 
 
 class Group(ABC):
@@ -15,6 +16,40 @@ class Group(ABC):
     def square(self, x):
         return self.mult(x, x)
 
+    # Returns x^e by square-and-multiply
+    def exp(self, x, e):
+        x = self.lift(x)
+        ans = self.unit
+        for bit in bin(e)[2:]:
+            ans = self.square(ans)
+            if bit == "1":
+                ans = self.mult(ans, x)
+        return self.normalize(ans)
+
+    # Returns a hashable value identifying the element x
+    def key(self, x):
+        return x
+
+    # Returns the representation of the element x on which mult and square operate
+    def lift(self, x):
+        return x
+
+    # Returns the element represented by x
+    def normalize(self, x):
+        return x
+
+    # Returns whether the representations x and y are the same element
+    def eq(self, x, y):
+        return x == y
+
+    # Whether neg costs no more than a group operation, in which case multiexps
+    # recode their exponents with signed digits
+    cheap_neg = False
+
+    # Returns the inverse of the representation x
+    def neg(self, x):
+        return self.lift(self.exp(self.normalize(x), self.order - 1))
+
 
 class MultIntModP(Group):
     def __init__(self, p, order):
@@ -23,10 +58,127 @@ class MultIntModP(Group):
     def mult(self, x, y):
         return x * y
 
+    def key(self, x):
+        return x.x
+
 
 class EC(Group):
     def __init__(self, curve: Curve):
         Group.__init__(self, curve.G.IDENTITY_ELEMENT, curve.q)
 
+    cheap_neg = True
+
     def mult(self, x, y):
         return x + y
+
+    def neg(self, x):
+        return -x
+
+    # Native scalar multiplication
+    def exp(self, x, e):
+        return e * x
+
+    def key(self, x):
+        return (x.x, x.y)
+
+
+class ECJacobian(Group):
+    """
+    Elliptic curve group in which elements are represented by Jacobian coordinates (X, Y, Z),
+    standing for the affine point (X/Z^2, Y/Z^3), the unit having Z = 0.
+    Additions need no field inversion, points are converted to affine only by normalize.
+    """
+
+    cheap_neg = True
+
+    def __init__(self, curve: Curve):
+        Group.__init__(self, (1, 1, 0), curve.q)
+        self.curve = curve
+        self.p = curve.p
+        self.a = curve.a
+
+    def mult(self, x, y):
+        X1, Y1, Z1 = x
+        X2, Y2, Z2 = y
+        if not Z1:
+            return y
+        if not Z2:
+            return x
+        p = self.p
+        Z1Z1 = Z1 * Z1 % p
+        U2 = X2 * Z1Z1 % p
+        S2 = Y2 * Z1 * Z1Z1 % p
+        if Z2 == 1:
+            # Mixed addition, y being affine
+            U1, S1 = X1, Y1
+        else:
+            Z2Z2 = Z2 * Z2 % p
+            U1 = X1 * Z2Z2 % p
+            S1 = Y1 * Z2 * Z2Z2 % p
+        H = (U2 - U1) % p
+        R = (S2 - S1) % p
+        if not H:
+            return self.square(x) if not R else self.unit
+        HH = H * H % p
+        HHH = H * HH % p
+        V = U1 * HH % p
+        X3 = (R * R - HHH - 2 * V) % p
+        Y3 = (R * (V - X3) - S1 * HHH) % p
+        Z3 = Z1 * H % p if Z2 == 1 else Z1 * Z2 * H % p
+        return X3, Y3, Z3
+
+    def square(self, x):
+        X1, Y1, Z1 = x
+        if not Z1 or not Y1:
+            return self.unit
+        p = self.p
+        XX = X1 * X1 % p
+        YY = Y1 * Y1 % p
+        S = 4 * X1 * YY % p
+        M = 3 * XX
+        if self.a:
+            ZZ = Z1 * Z1 % p
+            M += self.a * ZZ * ZZ
+        M %= p
+        X3 = (M * M - 2 * S) % p
+        Y3 = (M * (S - X3) - 8 * YY * YY) % p
+        Z3 = 2 * Y1 * Z1 % p
+        return X3, Y3, Z3
+
+    # Returns the inverse of x
+    def neg(self, x):
+        X, Y, Z = x
+        return X, (self.p - Y) % self.p, Z
+
+    # Native scalar multiplication
+    def exp(self, x, e):
+        return e * x
+
+    def key(self, x):
+        return (x.x, x.y)
+
+    def lift(self, x):
+        if x == Point.IDENTITY_ELEMENT:
+            return self.unit
+        return (x.x, x.y, 1)
+
+    def normalize(self, x):
+        X, Y, Z = x
+        if not Z:
+            return Point.IDENTITY_ELEMENT
+        p = self.p
+        Z_inv = pow(Z, p - 2, p)
+        Z_inv2 = Z_inv * Z_inv % p
+        return Point(X * Z_inv2 % p, Y * Z_inv2 * Z_inv % p, self.curve)
+
+    def eq(self, x, y):
+        X1, Y1, Z1 = x
+        X2, Y2, Z2 = y
+        if not Z1 or not Z2:
+            return not Z1 and not Z2
+        p = self.p
+        Z1Z1 = Z1 * Z1 % p
+        Z2Z2 = Z2 * Z2 % p
+        return (X1 * Z2Z2 - X2 * Z1Z1) % p == 0 and (
+            Y1 * Z2Z2 * Z2 - Y2 * Z1Z1 * Z1
+        ) % p == 0
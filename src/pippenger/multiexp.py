@@ -0,0 +1,176 @@
+from math import ceil
+from time import perf_counter
+import json
+import os
+import secrets
+
+
+# Returns Prod g_i ^ e_i as a product of single exponentiations
+def naive_multiexp(G, gs, es):
+    ans = G.unit
+    for g, e in zip(gs, es):
+        if e:
+            ans = G.mult(ans, G.lift(G.exp(g, e)))
+    return G.normalize(ans)
+
+
+# Returns Prod g_i ^ e_i with Straus' interleaved window method: every g_i gets a
+# table of its first 2^window - 1 powers and all exponents share the squarings.
+# The lifted elements and the exponents are first transformed by split, if given.
+def straus_multiexp(G, gs, es, window=4, split=None):
+    mask = (1 << window) - 1
+    gs = [G.lift(g) for g in gs]
+    if split is not None:
+        gs, es = split(gs, es)
+    tables = []
+    for g in gs:
+        table = [None, g]
+        for _ in range(mask - 1):
+            table.append(G.mult(table[-1], g))
+        tables.append(table)
+    lamb = max(es).bit_length() if es else 0
+    ans = None
+    for w in range(ceil(lamb / window) - 1, -1, -1):
+        if ans is not None:
+            for _ in range(window):
+                ans = G.square(ans)
+        shift = w * window
+        for table, e in zip(tables, es):
+            d = (e >> shift) & mask
+            if d:
+                ans = table[d] if ans is None else G.mult(ans, table[d])
+    return G.normalize(G.unit if ans is None else ans)
+
+
+class MultiexpDispatcher:
+    """
+    Registry of multiexp engines over the group of a Pippenger instance.
+    Each call goes to the engine that is the fastest for its number of exponents according to
+    self.crossovers, a list of (max_size, engine name) sorted by size, the last max_size being None.
+    Calls involving elements with fixed-base tables always go to the Pippenger instance.
+    Calls with more than chunk_size exponents, if set, are streamed by chunks to bound memory.
+    Calls with at least parallel_threshold exponents go to the parallel engine, if set by set_parallel.
+    """
+
+    def __init__(self, pippenger, crossovers=None, chunk_size=None):
+        self.pippenger = pippenger
+        self.chunk_size = chunk_size
+        self.parallel = None
+        self.parallel_threshold = None
+        self.G = pippenger.G
+        self.engines = {
+            "naive": lambda gs, es: naive_multiexp(self.G, gs, es),
+            "straus": lambda gs, es: straus_multiexp(
+                self.G, gs, es, split=self.pippenger.shorten
+            ),
+            "pippenger": self.pippenger.multiexp,
+        }
+        self.crossovers = crossovers or [(None, "pippenger")]
+
+    def register(self, name, engine):
+        """Registers engine(gs, es) under name, exponents being reduced modulo the group order"""
+        self.engines[name] = engine
+
+    def set_parallel(self, engine, threshold=0):
+        """
+        Sends the calls with at least threshold exponents to engine(gs, es), which splits them
+        across processes. Parallel calls are disabled if engine is None.
+        """
+        self.parallel = engine
+        self.parallel_threshold = threshold
+
+    def engine(self, N):
+        """Returns the name of the engine used for N exponents"""
+        for max_size, name in self.crossovers:
+            if max_size is None or N <= max_size:
+                return name
+        return self.crossovers[-1][1]
+
+    # Returns Prod g_i ^ e_i
+    def multiexp(self, gs, es):
+        if len(gs) != len(es):
+            raise Exception('Different number of group elements and exponents')
+        if self.parallel is not None and len(gs) >= self.parallel_threshold:
+            return self.parallel(gs, es)
+        if self.chunk_size is not None and len(gs) > self.chunk_size:
+            return self.multiexp_stream(zip(gs, es))
+        tables = self.pippenger.tables
+        if tables and any(self.G.key(g) in tables for g in gs):
+            return self.pippenger.multiexp(gs, es)
+        order = self.G.order
+        return self.engines[self.engine(len(gs))](gs, [e % order for e in es])
+
+    def is_unit(self, gs, es):
+        """
+        Returns whether Prod g_i ^ e_i is the unit. Outside of parallel calls, it is computed
+        by the Pippenger instance and compared to the unit with eq, without being normalized.
+        """
+        if len(gs) != len(es):
+            raise Exception('Different number of group elements and exponents')
+        if self.parallel is not None and len(gs) >= self.parallel_threshold:
+            return self.G.eq(self.G.lift(self.parallel(gs, es)), self.G.unit)
+        if self.chunk_size is not None and len(gs) > self.chunk_size:
+            return self.is_unit_stream(zip(gs, es))
+        return self.pippenger.is_unit(gs, es)
+
+    def is_unit_stream(self, pairs, chunk_size=None):
+        """Returns whether the product of multiexp_stream(pairs, chunk_size) is the unit, without normalizing it"""
+        chunk_size = chunk_size or self.chunk_size or 4096
+        return self.pippenger.is_unit_stream(pairs, chunk_size)
+
+    def multiexp_stream(self, pairs, chunk_size=None):
+        """
+        Returns Prod g_i ^ e_i for the pairs (g_i, e_i) of the iterable pairs, consumed by
+        chunks of chunk_size pairs (self.chunk_size, or 4096 if neither is set)
+        """
+        chunk_size = chunk_size or self.chunk_size or 4096
+        return self.pippenger.multiexp_stream(pairs, chunk_size)
+
+    def autotune(self, gs, sizes=(1, 2, 4, 8, 16, 32, 64, 128, 256), repeat=3):
+        """
+        Benchmarks every engine on the first N elements of gs for each N of sizes, with random
+        exponents, and sets the crossovers to the fastest engine for each range of sizes.
+        """
+        best = []
+        for N in sizes:
+            es = [secrets.randbelow(self.G.order) for _ in range(N)]
+            timings = {}
+            for name, engine in self.engines.items():
+                times = []
+                for _ in range(repeat):
+                    start = perf_counter()
+                    engine(gs[:N], es)
+                    times.append(perf_counter() - start)
+                timings[name] = min(times)
+            best.append((N, min(timings, key=timings.get)))
+        crossovers = []
+        for N, name in best:
+            if crossovers and crossovers[-1][1] == name:
+                crossovers[-1] = (N, name)
+            else:
+                crossovers.append((N, name))
+        crossovers[-1] = (None, crossovers[-1][1])
+        self.crossovers = crossovers
+        return crossovers
+
+    def save(self, path):
+        """Stores the crossovers in the JSON file path"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"crossovers": self.crossovers}, f)
+
+    def load(self, path):
+        """Loads crossovers stored by save, ignoring unknown engines. Returns whether they were loaded"""
+        try:
+            with open(path) as f:
+                crossovers = [tuple(c) for c in json.load(f)["crossovers"]]
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        if not crossovers or any(
+            len(c) != 2 or c[1] not in self.engines for c in crossovers
+        ):
+            return False
+        self.crossovers = crossovers
+        return True
@@ -1,16 +1,40 @@
-from sympy import integer_nthroot
-from math import log2, floor
-from itertools import combinations
+from math import ceil
+
+
+def signed_digits(e, c):
+    """
+    Returns the digits of the non-negative integer e in base 2^c, lowest first, each digit being
+    in [-2^(c-1), 2^(c-1)]. A digit above 2^(c-1) is replaced by its difference with 2^c and a
+    carry to the next digit, so that only 2^(c-1) buckets are needed and inverses are used instead.
+    """
+    half = 1 << (c - 1)
+    base = 1 << c
+    mask = base - 1
+    digits = []
+    while e:
+        d = e & mask
+        e >>= c
+        if d > half:
+            d -= base
+            e += 1
+        digits.append(d)
+    return digits
 
-def subset_of(l):
-    return sum(map(lambda r: list(combinations(l, r)), range(1, len(l)+1)), [])
 
 class Pippenger:
-    def __init__(self, group):
+    def __init__(self, group, table_window=4):
         self.G = group
         self.order = group.order
         self.lamb = group.order.bit_length()
-    
+        # Exponents are recoded with signed digits if inverses are cheap
+        self.signed = group.cheap_neg
+        # Fixed-base tables: key(g) -> [g^(2^(table_window*k)) for each k]
+        self.table_window = table_window
+        self.tables = {}
+        # key(g) -> number of precompute calls not yet released, tables being shared
+        # by all the sets of elements containing g
+        self.refs = {}
+
     # Returns g^(2^j)
     def _pow2powof2(self, g, j):
         tmp = g
@@ -18,80 +42,240 @@ class Pippenger:
             tmp = self.G.square(tmp)
         return tmp
 
+    # Returns the number of buckets of a window of c bits
+    def _buckets(self, c):
+        return 2 ** (c - 1) if self.signed else 2 ** c - 1
+
+    # Returns the window size c minimizing the number of group operations
+    # windows * (N + 2 * buckets) of the bucket method for N exponents of lamb bits,
+    # signed digits needing one more bit
+    def _window_size(self, N, lamb):
+        best_c, best_cost = 1, None
+        for c in range(1, 17):
+            cost = ceil((lamb + self.signed) / c) * (N + 2 * self._buckets(c))
+            if best_cost is None or cost < best_cost:
+                best_c, best_cost = c, cost
+        return best_c
+
+    # Returns the window size, a multiple of table_window, minimizing the
+    # number of group operations N * ceil(lamb/c) + 2 * buckets of a fixed-base
+    # multiexp of N exponents, in which all windows share the same buckets
+    def _fixed_window_size(self, N):
+        best_c, best_cost = self.table_window, None
+        for c in range(self.table_window, 17, self.table_window):
+            cost = N * ceil(self.lamb / c) + 2 * self._buckets(c)
+            if best_cost is None or cost < best_cost:
+                best_c, best_cost = c, cost
+        return best_c
+
+    def precompute(self, gs):
+        """
+        Builds fixed-base tables for the group elements gs.
+        Every later multiexp involving some of these elements uses their tables,
+        until each precompute call including them is matched by a release.
+        """
+        for g in gs:
+            key = self.G.key(g)
+            self.refs[key] = self.refs.get(key, 0) + 1
+            if key in self.tables:
+                continue
+            table = [self.G.lift(g)]
+            for _ in range(ceil(self.lamb / self.table_window) - 1):
+                table.append(self._pow2powof2(table[-1], self.table_window))
+            self.tables[key] = table
+
+    def has_tables(self, gs):
+        """Returns whether all the group elements gs have fixed-base tables"""
+        return all(self.G.key(g) in self.tables for g in gs)
+
+    def release(self, gs):
+        """
+        Releases the fixed-base tables of the group elements gs built by precompute,
+        a table being dropped when every precompute call including its element is released
+        """
+        for g in gs:
+            key = self.G.key(g)
+            if key not in self.refs:
+                continue
+            self.refs[key] -= 1
+            if self.refs[key] == 0:
+                del self.refs[key]
+                del self.tables[key]
+
     # Returns Prod g_i ^ e_i
     def multiexp(self, gs, es):
         if len(gs) != len(es):
             raise Exception('Different number of group elements and exponents')
+        ans = self._multiexp(gs, es)
+        return self.G.normalize(self.G.unit if ans is None else ans)
+
+    def is_unit(self, gs, es):
+        """Returns whether Prod g_i ^ e_i is the unit, compared with eq so that it is never normalized"""
+        if len(gs) != len(es):
+            raise Exception('Different number of group elements and exponents')
+        ans = self._multiexp(gs, es)
+        return ans is None or self.G.eq(ans, self.G.unit)
 
+    def multiexp_stream(self, pairs, chunk_size=4096):
+        """
+        Returns Prod g_i ^ e_i for the pairs (g_i, e_i) of the iterable pairs, which may be a
+        generator. Pairs are consumed chunk_size at a time and only the running product of the
+        chunks is kept, so that memory is bounded by one chunk whatever the number of pairs.
+        """
+        ans = self._multiexp_stream(pairs, chunk_size)
+        return self.G.normalize(self.G.unit if ans is None else ans)
+
+    def is_unit_stream(self, pairs, chunk_size=4096):
+        """Returns whether the product of multiexp_stream is the unit, without normalizing it"""
+        ans = self._multiexp_stream(pairs, chunk_size)
+        return ans is None or self.G.eq(ans, self.G.unit)
+
+    # Returns the product of multiexp_stream, or None if it is the unit, in the
+    # representation of the group
+    def _multiexp_stream(self, pairs, chunk_size):
+        ans = None
+        gs, es = [], []
+        for g, e in pairs:
+            gs.append(g)
+            es.append(e)
+            if len(gs) == chunk_size:
+                ans = self._mult_partial(ans, self._multiexp(gs, es))
+                gs, es = [], []
+        if gs:
+            ans = self._mult_partial(ans, self._multiexp(gs, es))
+        return ans
+
+    # Returns the product of two results of _multiexp
+    def _mult_partial(self, x, y):
+        if x is None or y is None:
+            return y if x is None else x
+        return self.G.mult(x, y)
+
+    # Returns Prod g_i ^ e_i, or None if it is the unit, the result being in the
+    # representation of the group
+    def _multiexp(self, gs, es):
         es = [ei%self.G.order for ei in es]
 
         if len(gs) == 0:
-            return self.G.unit
-
-        lamb = self.lamb
-        N = len(gs)
-        s = integer_nthroot(lamb//N, 2)[0]+1
-        t = integer_nthroot(lamb*N,2)[0]+1
-        gs_bin = []
-        for i in range(N):
-            tmp = [gs[i]]
-            for j in range(1,s):
-                tmp.append(self.G.square(tmp[-1]))
-            gs_bin.append(tmp)
-        es_bin = []
-        for i in range(N):
-            tmp1 = []
-            for j in range(s):
-                tmp2 = []
-                for k in range(t):
-                    tmp2.append(int( bin(es[i])[2:].zfill(s*t)[-(j+s*k+1)]) )
-                tmp1.append(tmp2)
-            es_bin.append(tmp1)
-        
-        Gs = self._multiexp_bin(
-                [gs_bin[i][j] for i in range(N) for j in range(s)],
-                [es_bin[i][j] for i in range(N) for j in range(s)]
-                )
-
-        ans2 = Gs[-1]
-        for k in range(len(Gs)-2,-1,-1):
-            ans2 = self._pow2powof2(ans2, s)
-            ans2 = self.G.mult(ans2, Gs[k])
-
-        return ans2
-        
-    def _multiexp_bin(self, gs, es):
-        assert len(gs) == len(es)
-        M = len(gs)
-        b = floor( log2(M) - log2(log2(M)) )
-        b = b if b else 1
-        subsets = [list(range(i,min(i+b,M))) for i in range(0,M,b)]
-        Ts = [{sub: None for sub in subset_of(S)} for S in subsets]
-
-        for T,S in zip(Ts, subsets):
-            for i in S:
-                T[(i,)] = gs[i]
-            # Recursively set the subproducts in T
-            def set_sub(sub):
-                if T[sub] is None:
-                    if T[sub[:-1]] is None:
-                        set_sub(sub[:-1])
-                    T[sub] = self.G.mult(T[sub[:-1]], gs[sub[-1]])
-            for sub in T:
-                set_sub(sub)
-            
-        Gs = []
-        for k in range(len(es[0])):
-            tmp = self.G.unit
-            for T,S in zip(Ts, subsets):
-                sub_es = [j for j in S if es[j][k]]
-                sub_es = tuple(sub_es)
-                if not sub_es:
-                    continue
-                tmp = self.G.mult(tmp, T[sub_es])
-            Gs.append(tmp)
-            
-        return Gs
-
-            
+            return None
+
+        if self.tables:
+            tables, fixed_es, var_gs, var_es = [], [], [], []
+            for g, e in zip(gs, es):
+                table = self.tables.get(self.G.key(g))
+                if table is None:
+                    var_gs.append(self.G.lift(g))
+                    var_es.append(e)
+                else:
+                    tables.append(table)
+                    fixed_es.append(e)
+            if tables:
+                fixed_negs = [False] * len(fixed_es)
+                if self.signed:
+                    half = self.order // 2
+                    fixed_negs = [e > half for e in fixed_es]
+                    fixed_es = [self.order - e if e > half else e for e in fixed_es]
+                ans = self._multiexp_fixed(tables, fixed_es, fixed_negs)
+                if var_gs:
+                    ans = self._mult_partial(ans, self._multiexp_var(var_gs, var_es))
+                return ans
+
+        return self._multiexp_var([self.G.lift(g) for g in gs], es)
+
+    # Returns elements and exponents with the same multiexp as gs and es, gs being in
+    # the representation of the group. Overridden to shorten exponents with an endomorphism.
+    def split(self, gs, es):
+        return gs, es
+
+    def shorten(self, gs, es):
+        """
+        Returns elements and exponents with the same multiexp as the elements gs, in the
+        representation of the group, and the exponents es in [0, order). If inverses are cheap,
+        exponents above order/2 are replaced by order - e and their elements by their inverses.
+        The result is then given to split.
+        """
+        if self.signed:
+            half = self.order // 2
+            gs = [self.G.neg(g) if e > half else g for g, e in zip(gs, es)]
+            es = [self.order - e if e > half else e for e in es]
+        return self.split(gs, es)
+
+    # Returns Prod g_i ^ e_i, or None if it is the unit, gs and the result being
+    # in the representation of the group
+    def _multiexp_var(self, gs, es):
+        gs, es = self.shorten(gs, es)
+        lamb = max([e.bit_length() for e in es], default=0)
+        if not lamb:
+            return None
+        c = self._window_size(len(gs), lamb)
+        if self.signed:
+            digits = [signed_digits(e, c) for e in es]
+            neg_gs = [self.G.neg(g) for g in gs]
+            windows = max(len(ds) for ds in digits)
+        else:
+            mask = (1 << c) - 1
+            windows = ceil(lamb / c)
+        ans = None
+        for w in range(windows - 1, -1, -1):
+            if ans is not None:
+                ans = self._pow2powof2(ans, c)
+            buckets = [None] * (self._buckets(c) + 1)
+            if self.signed:
+                for g, neg_g, ds in zip(gs, neg_gs, digits):
+                    if w < len(ds):
+                        d = ds[w]
+                        if d > 0:
+                            self._add_to_bucket(buckets, d, g)
+                        elif d < 0:
+                            self._add_to_bucket(buckets, -d, neg_g)
+            else:
+                shift = w * c
+                for g, e in zip(gs, es):
+                    self._add_to_bucket(buckets, (e >> shift) & mask, g)
+            window = self._combine_buckets(buckets)
+            if window is not None:
+                ans = window if ans is None else self.G.mult(ans, window)
+        return ans
+
+    # Returns Prod g_i ^ (-1)^negs_i e_i where g_i is given by its fixed-base table, or
+    # None if it is the unit. Table entries are g_i^(2^(c*k)), so every window of every
+    # exponent goes to the same buckets and no squaring is needed.
+    # Exponents are at most order/2 when signed, so the last carry fits in the table.
+    def _multiexp_fixed(self, tables, es, negs):
+        c = self._fixed_window_size(len(tables))
+        step = c // self.table_window
+        buckets = [None] * (self._buckets(c) + 1)
+        if self.signed:
+            for table, e, neg in zip(tables, es, negs):
+                for k, d in enumerate(signed_digits(e, c)):
+                    if d:
+                        g = table[k * step]
+                        if (d < 0) != neg:
+                            g = self.G.neg(g)
+                        self._add_to_bucket(buckets, abs(d), g)
+            return self._combine_buckets(buckets)
+        mask = (1 << c) - 1
+        for table, e in zip(tables, es):
+            k = 0
+            while e:
+                self._add_to_bucket(buckets, e & mask, table[k])
+                e >>= c
+                k += step
+        return self._combine_buckets(buckets)
+
+    def _add_to_bucket(self, buckets, d, g):
+        if d:
+            buckets[d] = g if buckets[d] is None else self.G.mult(buckets[d], g)
 
+    # Returns Prod buckets[d]^d, or None if it is the unit.
+    # The buckets are combined with running products so that bucket d is counted d times.
+    def _combine_buckets(self, buckets):
+        mult = self.G.mult
+        running = None
+        total = None
+        for d in range(len(buckets) - 1, 0, -1):
+            if buckets[d] is not None:
+                running = buckets[d] if running is None else mult(running, buckets[d])
+            if running is not None:
+                total = running if total is None else mult(total, running)
+        return total
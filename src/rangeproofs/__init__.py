@@ -2,10 +2,14 @@ from .rangeproof_prover import NIRangeProver
 from .rangeproof_verifier import RangeVerifier
 from .rangeproof_aggreg_prover import AggregNIRangeProver
 from .rangeproof_aggreg_verifier import AggregRangeVerifier
+from .rangeproof_batch_verifier import BatchRangeVerifier
+from .rangeproof_bulk_prover import BulkRangeProver
 
 __all__ = [
     "NIRangeProver",
     "RangeVerifier",
     "AggregNIRangeProver",
     "AggregRangeVerifier",
+    "BatchRangeVerifier",
+    "BulkRangeProver",
 ]
@@ -1,10 +1,15 @@
-from typing import List
-from ..utils.utils import Point, ModP, inner_product, mod_hash
+from concurrent.futures import Executor
+from typing import List, Optional
+from ..utils.utils import Point, ModP, mod_hash
+from ..utils.scalar_vector import ScalarVector
+from ..utils.power_vectors import RangePowers
+from ..utils.limb_vector import use_limb_vectors, to_vectors, to_scalar_vector
 from ..utils.transcript import Transcript
-from ..utils.commitments import vector_commitment, commitment
+from ..utils.commitments import commitment, bit_vector_commitment
+from ..utils.parallel import multiexps, submit_multiexps
 from .rangeproof_verifier import Proof
 from ..innerproduct.inner_product_prover import NIProver
-from ..pippenger import PipSECP256k1
+from ..pippenger import MultiexpSECP256k1
 
 
 class AggregNIRangeProver:
@@ -20,6 +25,10 @@ class AggregNIRangeProver:
         u: Point,
         group,
         seed: bytes = b"",
+        legacy_transcript: bool = False,
+        include_transcript: bool = True,
+        generator_folding: str = "deferred",
+        executor: Optional[Executor] = None,
     ):
         self.vs = vs
         self.n = n
@@ -30,7 +39,10 @@ class AggregNIRangeProver:
         self.gammas = gammas
         self.u = u
         self.group = group
-        self.transcript = Transcript(seed)
+        self.include_transcript = include_transcript
+        self.generator_folding = generator_folding
+        self.executor = executor
+        self.transcript = Transcript(seed, legacy_transcript, include_transcript)
         self.m = len(vs)
 
     def prove(self):
@@ -40,46 +52,68 @@ class AggregNIRangeProver:
         gs = self.gs
         hs = self.hs
         h = self.h
+        q = self.group.q
 
         aL = []
         for v in vs:
             aL += list(map(int, reversed(bin(v.x)[2:].zfill(n))))[:n]
-        aR = [
-            (x - 1) % self.group.q for x in aL
-        ]  # TODO implement inverse of elliptic curve point  to compute -1 * g instead of multiplying by p-1
+        aL = ScalarVector(aL, q)
+        aR = aL - 1
 
-        alpha = mod_hash(b"alpha" + self.transcript.digest, self.group.q)
-        A = vector_commitment(gs, hs, aL, aR) + alpha * h
-        sL = [
-            mod_hash(str(i).encode() + self.transcript.digest, self.group.q)
-            for i in range(n * m)
-        ]
-        sR = [
-            mod_hash(str(i).encode() + self.transcript.digest, self.group.q)
-            for i in range(n * m, 2 * n * m)
-        ]
-        rho = mod_hash(str(2 * n).encode() + self.transcript.digest, self.group.q)
-        S = vector_commitment(gs, hs, sL, sR) + rho * h
+        alpha = mod_hash(b"alpha" + self.transcript.digest, q)
+        sL = ScalarVector.from_scalars(
+            [mod_hash(str(i).encode() + self.transcript.digest, q) for i in range(n * m)],
+            q,
+        )
+        sR = ScalarVector.from_scalars(
+            [
+                mod_hash(str(i).encode() + self.transcript.digest, q)
+                for i in range(n * m, 2 * n * m)
+            ],
+            q,
+        )
+        rho = mod_hash(str(2 * n).encode() + self.transcript.digest, q)
+        # S is submitted to the executor, if any, while A is computed here:
+        # aL is a bit vector, so A only needs point additions and subtractions
+        wait_S = submit_multiexps(self.executor, [(gs + hs, sL.xs + sR.xs)])
+        A = bit_vector_commitment(gs, hs, aL.xs) + alpha * h
+        (S,) = wait_S()
+        S = S + rho * h
         self.transcript.add_list_points([A, S])
         y = self.transcript.get_modp(self.group.q)
         self.transcript.add_number(y)
         z = self.transcript.get_modp(self.group.q)
         self.transcript.add_number(z)
+        powers = RangePowers(y, z, n, m, q)
+
+        vectors = [aL, aR, sL, sR, powers.yn, powers.z2n]
+        limbs = use_limb_vectors(len(aL))
+        if limbs:
+            # Opt-in NumPy limbs, disabled unless limb_vector.LIMB_VECTOR_MIN_SIZE is set
+            vectors = to_vectors(vectors)
 
-        t1, t2 = self._get_polynomial_coeffs(aL, aR, sL, sR, y, z)
+        t1, t2 = self._get_polynomial_coeffs(*vectors, z)
         tau1 = mod_hash(b"tau1" + self.transcript.digest, self.group.q)
         tau2 = mod_hash(b"tau2" + self.transcript.digest, self.group.q)
-        T1 = commitment(self.g, h, t1, tau1)
-        T2 = commitment(self.g, h, t2, tau2)
+        if self.executor is None:
+            T1 = commitment(self.g, h, t1, tau1)
+            T2 = commitment(self.g, h, t2, tau2)
+        else:
+            T1, T2 = multiexps(
+                self.executor, [([self.g, h], [t1, tau1]), ([self.g, h], [t2, tau2])]
+            )
         self.transcript.add_list_points([T1, T2])
         x = self.transcript.get_modp(self.group.q)
         self.transcript.add_number(x)
         taux, mu, t_hat, ls, rs = self._final_compute(
-            aL, aR, sL, sR, y, z, x, tau1, tau2, alpha, rho
+            *vectors, powers.zs, z, x, tau1, tau2, alpha, rho
         )
+        if limbs:
+            ls, rs = to_scalar_vector(ls), to_scalar_vector(rs)
 
         # return Proof(taux, mu, t_hat, ls, rs, T1, T2, A, S), x,y,z
-        hsp = [(y.inv() ** i) * hs[i] for i in range(n * m)]
+        # The inner-product argument is over hsp_i = y^-i * hs_i. hs is given with the scalars
+        # y^-i instead, so that P and deferred folding can use the fixed-base tables of hs
         # P = (
         #     A
         #     + x * S
@@ -92,55 +126,56 @@ class AggregNIRangeProver:
         P = (
             A
             + x * S
-            + PipSECP256k1.multiexp(
-                gs + hsp,
-                [-z for _ in range(n * m)]
-                + [
-                    (z * (y ** i)) + (z ** (2 + (i // self.n))) * (2 ** (i % self.n))
-                    for i in range(n * m)
-                ],
+            + MultiexpSECP256k1.multiexp(
+                gs + hs,
+                [-z for _ in range(n * m)] + (powers.y_inv_n * powers.z2n + z).xs,
             )
         )
-        InnerProv = NIProver(gs, hsp, self.u, P + (-mu) * h, t_hat, ls, rs, self.group)
+        InnerProv = NIProver(
+            gs,
+            hs,
+            self.u,
+            P + (-mu) * h,
+            t_hat,
+            ls,
+            rs,
+            self.group,
+            legacy_transcript=self.transcript.legacy,
+            include_transcript=self.include_transcript,
+            generator_folding=self.generator_folding,
+            executor=self.executor,
+            h_scalars=powers.y_inv_n,
+        )
         innerProof = InnerProv.prove()
+        self.timings = InnerProv.timings
 
         ### DEBUG ###
-        delta_yz = (z - z ** 2) * sum(
-            [y ** i for i in range(n * m)], ModP(0, self.group.q)
-        ) - sum(
-            [(z ** (j + 2)) * ModP(2 ** n - 1, self.group.q) for j in range(1, m + 1)]
-        )
-        t0 = sum([vs[j] * (z ** (2 + j)) for j in range(m)]) + delta_yz
+        t0 = powers.zs.inner_product(vs) + powers.delta
         ### DEBUG ###
-        return Proof(taux, mu, t_hat, T1, T2, A, S, innerProof, self.transcript.digest)
+        return Proof(
+            taux,
+            mu,
+            t_hat,
+            T1,
+            T2,
+            A,
+            S,
+            innerProof,
+            self.transcript.digest if self.include_transcript else None,
+        )
 
-    def _get_polynomial_coeffs(self, aL, aR, sL, sR, y, z):
-        t1 = inner_product(
-            sL,
-            [
-                (y ** i) * (aR[i] + z)
-                + (z ** (2 + (i // self.n))) * (2 ** (i % self.n))
-                for i in range(self.n * self.m)
-            ],
-        ) + inner_product(
-            [aL[i] - z for i in range(self.n * self.m)],
-            [(y ** i) * sR[i] for i in range(self.n * self.m)],
+    def _get_polynomial_coeffs(self, aL, aR, sL, sR, yn, z2n, z):
+        yn_sR = yn * sR
+        t1 = sL.inner_product(yn * (aR + z) + z2n) + (aL - z).inner_product(
+            yn_sR
         )
-        t2 = inner_product(sL, [(y ** i) * sR[i] for i in range(self.n * self.m)])
+        t2 = sL.inner_product(yn_sR)
         return t1, t2
 
-    def _final_compute(self, aL, aR, sL, sR, y, z, x, tau1, tau2, alpha, rho):
-        ls = [aL[i] - z + sL[i] * x for i in range(self.n * self.m)]
-        rs = [
-            (y ** i) * (aR[i] + z + sR[i] * x)
-            + (z ** (2 + (i // self.n))) * (2 ** (i % self.n))
-            for i in range(self.n * self.m)
-        ]
-        t_hat = inner_product(ls, rs)
-        taux = (
-            tau2 * (x ** 2)
-            + tau1 * x
-            + sum([(z ** (2 + j)) * self.gammas[j] for j in range(self.m)])
-        )
+    def _final_compute(self, aL, aR, sL, sR, yn, z2n, zs, z, x, tau1, tau2, alpha, rho):
+        ls = (aL - z).mul_add(x, sL)
+        rs = yn * (aR + z).mul_add(x, sR) + z2n
+        t_hat = ls.inner_product(rs)
+        taux = tau2 * (x ** 2) + tau1 * x + zs.inner_product(self.gammas)
         mu = alpha + rho * x
         return taux, mu, t_hat, ls, rs
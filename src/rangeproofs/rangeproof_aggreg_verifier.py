@@ -1,8 +1,13 @@
+from typing import Optional
+
 from fastecdsa.curve import secp256k1
 
-from ..utils.utils import ModP, point_to_b64
-from ..innerproduct.inner_product_verifier import Verifier1
-from ..pippenger import PipSECP256k1
+from ..utils.utils import ModP, point_to_b64, random_modp
+from ..utils.power_vectors import RangePowers
+from ..utils.serialization import Reader, encode_point, encode_scalar, encode_uint
+from ..utils.transcript import Transcript, seed_of
+from ..innerproduct.inner_product_verifier import Verifier1, Proof1
+from ..pippenger import MultiexpSECP256k1
 
 CURVE = secp256k1
 
@@ -21,11 +26,48 @@ class Proof:
         self.innerProof = innerProof
         self.transcript = transcript
 
+    def to_bytes(self) -> bytes:
+        """
+        Returns the binary encoding taux || mu || t_hat || T1 || T2 || A || S || innerProof || len(transcript) || transcript
+        with 32 bytes scalars, 33 bytes compressed points and 4 bytes lengths.
+        A transcript-free proof is encoded as taux || mu || t_hat || T1 || T2 || A || S || innerProof,
+        innerProof being transcript-free as well.
+        """
+        if self.transcript is None:
+            return b"".join(
+                [encode_scalar(x) for x in [self.taux, self.mu, self.t_hat]]
+                + [encode_point(g) for g in [self.T1, self.T2, self.A, self.S]]
+                + [self.innerProof.to_bytes()]
+            )
+        return b"".join(
+            [encode_scalar(x) for x in [self.taux, self.mu, self.t_hat]]
+            + [encode_point(g) for g in [self.T1, self.T2, self.A, self.S]]
+            + [
+                self.innerProof.to_bytes(),
+                encode_uint(len(self.transcript), 4),
+                self.transcript,
+            ]
+        )
+
+    @classmethod
+    def from_bytes(cls, data, with_transcript: bool = True) -> "Proof":
+        """
+        Decodes a proof encoded by to_bytes from a bytes-like object, e.g. a memoryview on a network buffer.
+        with_transcript must be unset to decode a transcript-free proof.
+        """
+        reader = Reader(data)
+        taux, mu, t_hat = [reader.scalar(CURVE.q) for _ in range(3)]
+        T1, T2, A, S = [reader.point() for _ in range(4)]
+        innerProof = Proof1.read(reader, with_transcript)
+        transcript = bytes(reader.read(reader.uint(4))) if with_transcript else None
+        reader.end()
+        return cls(taux, mu, t_hat, T1, T2, A, S, innerProof, transcript)
+
 
 class AggregRangeVerifier:
     """Verifier class for Range Proofs"""
 
-    def __init__(self, Vs, g, h, gs, hs, u, proof: Proof):
+    def __init__(self, Vs, g, h, gs, hs, u, proof: Proof, legacy_transcript=False):
         self.Vs = Vs
         self.g = g
         self.h = h
@@ -33,6 +75,7 @@ class AggregRangeVerifier:
         self.hs = hs
         self.u = u
         self.proof = proof
+        self.legacy_transcript = legacy_transcript
 
     def assertThat(self, expr: bool):
         """Assert that expr is truthy else raise exception"""
@@ -43,17 +86,51 @@ class AggregRangeVerifier:
         """Verify a transcript to assure Fiat-Shamir was done properly"""
         proof = self.proof
         p = proof.taux.p
+        if proof.transcript is None:
+            # Transcript-free proof, the challenges are recomputed from the proof points
+            transcript = Transcript()
+            transcript.add_list_points([proof.A, proof.S])
+            self.y = self._challenge(transcript)
+            self.z = self._challenge(transcript)
+            transcript.add_list_points([proof.T1, proof.T2])
+            self.x = self._challenge(transcript)
+            return
         lTranscript = proof.transcript.split(b"&")
         self.assertThat(lTranscript[1] == point_to_b64(proof.A))
         self.assertThat(lTranscript[2] == point_to_b64(proof.S))
-        self.y = ModP(int(lTranscript[3]), p)
-        self.z = ModP(int(lTranscript[4]), p)
         self.assertThat(lTranscript[5] == point_to_b64(proof.T1))
         self.assertThat(lTranscript[6] == point_to_b64(proof.T2))
-        self.x = ModP(int(lTranscript[7]), p)
-
-    def verify(self):
-        """Verifies the proof given by a prover. Raises an execption if it is invalid"""
+        if self.legacy_transcript:
+            self.y = ModP(int(lTranscript[3]), p)
+            self.z = ModP(int(lTranscript[4]), p)
+            self.x = ModP(int(lTranscript[7]), p)
+            return
+
+        seed = seed_of(proof.transcript)
+        self.assertThat(seed is not None)
+        transcript = Transcript(seed)
+        transcript.add_list_points([proof.A, proof.S])
+        self.y = self._challenge(transcript, lTranscript[3])
+        self.z = self._challenge(transcript, lTranscript[4])
+        transcript.add_list_points([proof.T1, proof.T2])
+        self.x = self._challenge(transcript, lTranscript[7])
+        # The carried transcript must be the replayed one byte for byte
+        self.assertThat(proof.transcript == transcript.digest)
+
+    def _challenge(self, transcript: Transcript, claimed: Optional[bytes] = None) -> ModP:
+        """Squeezes a challenge from the transcript and checks that it is the claimed one, if any"""
+        x = transcript.get_modp(CURVE.q)
+        self.assertThat(claimed is None or claimed == str(x).encode())
+        transcript.add_number(x)
+        return x
+
+    def verify(self, single_multiexp: bool = False):
+        """
+        Verifies the proof given by a prover. Raises an execption if it is invalid.
+        If single_multiexp is set, all the checks are done with one multiexp.
+        """
+        if single_multiexp:
+            return self._verify_single_multiexp()
         self.verify_transcript()
 
         g = self.g
@@ -69,40 +146,93 @@ class AggregRangeVerifier:
         m = len(self.Vs)
         n = nm // m
 
-        delta_yz = (z - z ** 2) * sum(
-            [y ** i for i in range(nm)], ModP(0, CURVE.q)
-        ) - sum(
-            [
-                (z ** (j + 2)) * ModP(2 ** n - 1, CURVE.q)
-                for j in range(1, m + 1)
-            ]
-        )
-        hsp = [(y.inv() ** i) * hs[i] for i in range(nm)]
+        powers = RangePowers(y, z, n, m, CURVE.q)
+        hsp = [y_inv_i * hs_i for y_inv_i, hs_i in zip(powers.y_inv_n, hs)]
 
         self.assertThat(
             proof.t_hat * g + proof.taux * h
-            == PipSECP256k1.multiexp(
+            == MultiexpSECP256k1.multiexp(
                 self.Vs + [g, proof.T1, proof.T2],
-                [z ** (j + 2) for j in range(m)] + [delta_yz, x, x ** 2],
+                list(powers.zs) + [powers.delta, x, x ** 2],
             )
         )
 
-        P = self._getP(x, y, z, proof.A, proof.S, gs, hsp, n, m)
+        P = self._getP(x, z, powers, proof.A, proof.S, gs, hsp)
         InnerVerif = Verifier1(
-            gs, hsp, self.u, P + (-proof.mu) * h, proof.t_hat, proof.innerProof
+            gs,
+            hsp,
+            self.u,
+            P + (-proof.mu) * h,
+            proof.t_hat,
+            proof.innerProof,
+            self.legacy_transcript,
         )
         return InnerVerif.verify()
 
-    def _getP(self, x, y, z, A, S, gs, hsp, n, m):
+    def _getP(self, x, z, powers, A, S, gs, hsp):
         return (
             A
             + x * S
-            + PipSECP256k1.multiexp(
-                gs + hsp,
-                [-z for _ in range(n * m)]
-                + [
-                    (z * (y ** i)) + (z ** (2 + (i // n))) * (2 ** (i % n))
-                    for i in range(n * m)
-                ],
+            + MultiexpSECP256k1.multiexp(
+                gs + hsp, [-z for _ in gs] + (powers.yn * z + powers.z2n).xs
+            )
+        )
+
+    def multiexp_terms(self, weight: ModP):
+        """
+        Verifies the transcript and returns (gs_scalars, hs_scalars, g_scalar, h_scalar, u_scalar, points, scalars)
+        such that the proof is valid iff the multiexp of gs, hs, g, h, u, points by these scalars is the identity.
+        The t_hat check is weighted by `weight` and the inner-product check by 1,
+        the rescaled generators hsp are never computed.
+        """
+        self.verify_transcript()
+
+        x = self.x
+        y = self.y
+        z = self.z
+        proof = self.proof
+
+        nm = len(self.gs)
+        m = len(self.Vs)
+        n = nm // m
+
+        powers = RangePowers(y, z, n, m, CURVE.q)
+
+        InnerVerif = Verifier1(
+            self.gs,
+            self.hs,
+            self.u,
+            None,
+            proof.t_hat,
+            proof.innerProof,
+            self.legacy_transcript,
+        )
+        g_scalars, h_scalars, u_scalar, points, scalars = InnerVerif.multiexp_terms()
+
+        hs_scalars = [
+            ModP((y_inv_i * (hi.x - z2n_i) - z.x) % CURVE.q, CURVE.q)
+            for y_inv_i, hi, z2n_i in zip(powers.y_inv_n.xs, h_scalars, powers.z2n.xs)
+        ]
+        return (
+            [gi + z for gi in g_scalars],
+            hs_scalars,
+            weight * (proof.t_hat - powers.delta),
+            proof.mu + weight * proof.taux,
+            u_scalar,
+            points + self.Vs + [proof.A, proof.S, proof.T1, proof.T2],
+            scalars
+            + [-weight * zj for zj in powers.zs]
+            + [-ModP(1, CURVE.q), -x, -weight * x, -weight * (x ** 2)],
+        )
+
+    def _verify_single_multiexp(self):
+        gs_scalars, hs_scalars, g_scalar, h_scalar, u_scalar, points, scalars = self.multiexp_terms(
+            random_modp(CURVE.q)
+        )
+        self.assertThat(
+            MultiexpSECP256k1.is_unit(
+                self.gs + self.hs + [self.g, self.h, self.u] + points,
+                gs_scalars + hs_scalars + [g_scalar, h_scalar, u_scalar] + scalars,
             )
         )
+        return True
@@ -0,0 +1,106 @@
+from itertools import chain
+from typing import List, Optional, Tuple
+
+from fastecdsa.curve import secp256k1
+from fastecdsa.point import Point
+
+from ..utils.utils import ModP, random_modp
+from ..pippenger import MultiexpSECP256k1
+from .rangeproof_aggreg_verifier import AggregRangeVerifier, Proof
+
+CURVE = secp256k1
+
+
+class BatchRangeVerifier:
+    """
+    Verifier class for batches of (aggregated) Range Proofs of n bits sharing the same generators.
+    A proof of m values uses the first n*m generators of gs and hs.
+    If chunk_size is set, the final multiexp is streamed by chunks of chunk_size points
+    to bound its memory.
+    """
+
+    def __init__(
+        self,
+        n: int,
+        g,
+        h,
+        gs,
+        hs,
+        u,
+        proofs: List[Tuple[List[Point], Proof]],
+        legacy_transcript=False,
+        chunk_size: Optional[int] = None,
+    ):
+        self.n = n
+        self.g = g
+        self.h = h
+        self.gs = gs
+        self.hs = hs
+        self.u = u
+        self.proofs = proofs
+        self.legacy_transcript = legacy_transcript
+        self.chunk_size = chunk_size
+
+    def assertThat(self, expr: bool):
+        """Assert that expr is truthy else raise exception"""
+        if not expr:
+            raise Exception("Proof invalid")
+
+    def verify(self):
+        """
+        Verifies all the proofs with a single multiexp, each proof equation being weighted by
+        a random scalar. Raises an exception if one of them is invalid.
+        """
+        q = CURVE.q
+        gs_scalars = [ModP(0, q) for _ in self.gs]
+        hs_scalars = [ModP(0, q) for _ in self.hs]
+        g_scalar = h_scalar = u_scalar = ModP(0, q)
+        points = []
+        scalars = []
+        for Vs, proof in self.proofs:
+            # The bit width is the verifier's, never the one the proof claims
+            nm = self.n * len(Vs)
+            self.assertThat(
+                0 < nm <= min(len(self.gs), len(self.hs))
+                and 2 ** len(proof.innerProof.proof2.Ls) == nm
+            )
+            Verif = AggregRangeVerifier(
+                Vs,
+                self.g,
+                self.h,
+                self.gs[:nm],
+                self.hs[:nm],
+                self.u,
+                proof,
+                self.legacy_transcript,
+            )
+            gsp, hsp, gp, hp, up, pointsp, scalarsp = Verif.multiexp_terms(
+                random_modp(q)
+            )
+            r = random_modp(q)
+            for i in range(nm):
+                gs_scalars[i] += r * gsp[i]
+                hs_scalars[i] += r * hsp[i]
+            g_scalar += r * gp
+            h_scalar += r * hp
+            u_scalar += r * up
+            points += pointsp
+            scalars += [r * s for s in scalarsp]
+
+        if self.chunk_size is None:
+            valid = MultiexpSECP256k1.is_unit(
+                self.gs + self.hs + [self.g, self.h, self.u] + points,
+                gs_scalars + hs_scalars + [g_scalar, h_scalar, u_scalar] + scalars,
+            )
+        else:
+            valid = MultiexpSECP256k1.is_unit_stream(
+                chain(
+                    zip(self.gs, gs_scalars),
+                    zip(self.hs, hs_scalars),
+                    zip([self.g, self.h, self.u], [g_scalar, h_scalar, u_scalar]),
+                    zip(points, scalars),
+                ),
+                self.chunk_size,
+            )
+        self.assertThat(valid)
+        return True
@@ -0,0 +1,145 @@
+"""Contains a prover creating many single-value range proofs on a pool of processes"""
+
+from multiprocessing import Pool
+from typing import Iterator, List, Optional, Tuple
+import os
+
+from fastecdsa.curve import secp256k1
+
+from ..utils.utils import ModP
+from ..utils.generators import PrecomputedGenerators
+from ..utils.parallel import to_coords, from_coords, init_worker_multiexp
+from .rangeproof_prover import NIRangeProver
+from .rangeproof_verifier import Proof
+
+CURVE = secp256k1
+
+# Generators of the worker process, set once by _init_worker
+_worker_generators = None
+
+
+def _init_worker(coords: List[Tuple[int, int]], n: int):
+    global _worker_generators
+    init_worker_multiexp()
+    points = from_coords(coords)
+    _worker_generators = PrecomputedGenerators(
+        points[:n], points[n : 2 * n], *points[2 * n :]
+    )
+
+
+def _prove_chunk(args) -> List[Tuple[int, bytes]]:
+    # Proofs are returned encoded since unpickled curves are not the CURVE object
+    chunk, n, include_transcript = args
+    gens = _worker_generators
+    return [
+        (
+            i,
+            NIRangeProver(
+                ModP(v, CURVE.q),
+                n,
+                gens.g,
+                gens.h,
+                gens.gs,
+                gens.hs,
+                ModP(gamma, CURVE.q),
+                gens.u,
+                CURVE,
+                seed,
+                include_transcript=include_transcript,
+            )
+            .prove()
+            .to_bytes(),
+        )
+        for i, v, gamma, seed in chunk
+    ]
+
+
+class BulkRangeProver:
+    """
+    Prover creating many single-value range proofs of n bits over the same generators.
+    Proving is distributed on `processes` worker processes (os.cpu_count() by default),
+    which build the fixed-base tables of the generators once and keep them for all the proofs.
+    Proofs are sent to the workers by chunks of chunksize values.
+    """
+
+    def __init__(
+        self,
+        generators: PrecomputedGenerators,
+        n: int,
+        processes: Optional[int] = None,
+        chunksize: int = 16,
+        include_transcript: bool = True,
+    ):
+        assert len(generators.gs) >= n and len(generators.hs) >= n
+        self.generators = generators
+        self.n = n
+        self.chunksize = chunksize
+        self.include_transcript = include_transcript
+        self.processes = processes or os.cpu_count() or 1
+        self.pool = None
+        if self.processes > 1:
+            points = (
+                generators.gs[:n]
+                + generators.hs[:n]
+                + [generators.g, generators.h, generators.u]
+            )
+            self.pool = Pool(self.processes, _init_worker, (to_coords(points), n))
+
+    def close(self):
+        """Stops the worker processes"""
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def prove(
+        self,
+        values: List[Tuple[ModP, ModP]],
+        ordered: bool = True,
+        seeds: Optional[List[bytes]] = None,
+    ) -> Iterator[Tuple[int, Proof]]:
+        """
+        Proves that each v of the pairs (v, gamma) of values is in [0, 2^n), gamma being
+        the blinding factor of its commitment. Yields the pairs (index in values, proof)
+        as soon as they are ready, in the order of values if ordered is set.
+        The seeds of the proofs are random unless given.
+        """
+        if seeds is None:
+            seeds = [os.urandom(32) for _ in values]
+        assert len(seeds) == len(values)
+        tasks = [
+            (i, v.x, gamma.x, seed)
+            for i, ((v, gamma), seed) in enumerate(zip(values, seeds))
+        ]
+        chunks = [
+            (tasks[i : i + self.chunksize], self.n, self.include_transcript)
+            for i in range(0, len(tasks), self.chunksize)
+        ]
+        if self.pool is None:
+            gens = self.generators
+            for i, v, gamma, seed in tasks:
+                Prov = NIRangeProver(
+                    ModP(v, CURVE.q),
+                    self.n,
+                    gens.g,
+                    gens.h,
+                    gens.gs[: self.n],
+                    gens.hs[: self.n],
+                    ModP(gamma, CURVE.q),
+                    gens.u,
+                    CURVE,
+                    seed,
+                    include_transcript=self.include_transcript,
+                )
+                yield i, Prov.prove()
+            return
+        imap = self.pool.imap if ordered else self.pool.imap_unordered
+        for results in imap(_prove_chunk, chunks):
+            for i, data in results:
+                yield i, Proof.from_bytes(data, self.include_transcript)
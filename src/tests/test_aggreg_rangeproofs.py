@@ -1,10 +1,14 @@
 import unittest
 import os
+from concurrent.futures import ThreadPoolExecutor
 from random import randint
 from fastecdsa.curve import secp256k1
 from ..utils.commitments import commitment
 from ..utils.utils import mod_hash, ModP
 from ..utils.elliptic_curve_hash import elliptic_hash
+from ..utils.generators import PrecomputedGenerators
+from ..utils.parallel import process_pool
+from ..utils import limb_vector
 from ..rangeproofs import AggregNIRangeProver, AggregRangeVerifier
 
 
@@ -12,6 +16,23 @@ CURVE = secp256k1
 p = secp256k1.q
 
 
+def proof_args(vs, n):
+    """
+    Returns the arguments of an AggregNIRangeProver proving that each of vs has n bits on random
+    generators, and the arguments Vs, g, h, gs, hs, u of its verifier
+    """
+    m = len(vs)
+    seeds = [os.urandom(10) for _ in range(7)]
+    gs = [elliptic_hash(str(i).encode() + seeds[0], CURVE) for i in range(n * m)]
+    hs = [elliptic_hash(str(i).encode() + seeds[1], CURVE) for i in range(n * m)]
+    g = elliptic_hash(seeds[2], CURVE)
+    h = elliptic_hash(seeds[3], CURVE)
+    u = elliptic_hash(seeds[4], CURVE)
+    gammas = [mod_hash(seeds[5], p) for _ in range(m)]
+    Vs = [commitment(g, h, vs[i], gammas[i]) for i in range(m)]
+    return (vs, n, g, h, gs, hs, gammas, u, CURVE, seeds[6]), (Vs, g, h, gs, hs, u)
+
+
 class AggregRangeProofTest(unittest.TestCase):
     def test_different_seeds(self):
         for _ in range(10):
@@ -133,3 +154,72 @@ class AggregRangeProofTest(unittest.TestCase):
         with self.subTest(seeds=seeds, vs=vs, ind=ind):
             with self.assertRaisesRegex(Exception, "Proof invalid"):
                 Verif.verify()
+
+    def test_precomputed_generators(self):
+        vs = [ModP(randint(0, 2 ** 16 - 1), p) for _ in range(2)]
+        args, verifier_args = proof_args(vs, 16)
+        Vs, g, h, gs, hs, u = verifier_args
+        gens = PrecomputedGenerators(gs, hs, g, h, u)
+        try:
+            proof = AggregNIRangeProver(*args).prove()
+            self.assertTrue(AggregRangeVerifier(*verifier_args, proof).verify())
+        finally:
+            gens.release()
+
+    def test_executor(self):
+        vs = [ModP(randint(0, 2 ** 8 - 1), p) for _ in range(2)]
+        args, verifier_args = proof_args(vs, 8)
+        Vs, g, h, gs, hs, u = verifier_args
+        proof = AggregNIRangeProver(*args).prove()
+        with ThreadPoolExecutor(2) as executor:
+            Prov = AggregNIRangeProver(*args, executor=executor)
+            self.assertEqual(Prov.prove().to_bytes(), proof.to_bytes())
+        gens = PrecomputedGenerators(gs, hs, g, h, u)
+        with process_pool(2, gens) as executor:
+            Prov = AggregNIRangeProver(*args, executor=executor)
+            self.assertEqual(Prov.prove().to_bytes(), proof.to_bytes())
+        gens.release()
+        self.assertTrue(AggregRangeVerifier(*verifier_args, proof).verify())
+
+    def test_deferred_folding(self):
+        vs = [ModP(randint(0, 2 ** 8 - 1), p) for _ in range(2)]
+        args, verifier_args = proof_args(vs, 8)
+        Vs, g, h, gs, hs, u = verifier_args
+        proof = AggregNIRangeProver(*args, generator_folding="fold").prove()
+        Prov = AggregNIRangeProver(*args)
+        self.assertEqual(Prov.prove().to_bytes(), proof.to_bytes())
+        gens = PrecomputedGenerators(gs, hs, g, h, u)
+        Prov = AggregNIRangeProver(*args)
+        self.assertEqual(Prov.prove().to_bytes(), proof.to_bytes())
+        gens.release()
+        self.assertTrue(AggregRangeVerifier(*verifier_args, proof).verify())
+
+    @unittest.skipIf(limb_vector.np is None, "numpy is not installed")
+    def test_limb_vectors(self):
+        m, n = 4, 16
+        vs = [ModP(randint(0, 2 ** n - 1), p) for _ in range(m)]
+        args, verifier_args = proof_args(vs, n)
+        proof = AggregNIRangeProver(*args).prove()
+        min_size = limb_vector.LIMB_VECTOR_MIN_SIZE
+        limb_vector.LIMB_VECTOR_MIN_SIZE = n * m
+        try:
+            limb_proof = AggregNIRangeProver(*args).prove()
+        finally:
+            limb_vector.LIMB_VECTOR_MIN_SIZE = min_size
+        self.assertEqual(limb_proof.to_bytes(), proof.to_bytes())
+        self.assertTrue(AggregRangeVerifier(*verifier_args, limb_proof).verify())
+
+    def test_single_multiexp(self):
+        for m in [1, 2, 4]:
+            vs = [ModP(randint(0, 2 ** 16 - 1), p) for _ in range(m)]
+            ind = randint(0, m - 1)
+            args, verifier_args = proof_args(vs, 16)
+            proof = AggregNIRangeProver(*args).prove()
+            with self.subTest(vs=vs, m=m):
+                Verif = AggregRangeVerifier(*verifier_args, proof)
+                self.assertTrue(Verif.verify(single_multiexp=True))
+                Vs, g, h, gs, hs, u = verifier_args
+                Vs[ind] = Vs[ind] + h
+                Verif = AggregRangeVerifier(Vs, g, h, gs, hs, u, proof)
+                with self.assertRaisesRegex(Exception, "Proof invalid"):
+                    Verif.verify(single_multiexp=True)
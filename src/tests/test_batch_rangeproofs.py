@@ -0,0 +1,108 @@
+import unittest
+import os
+from random import randint
+from fastecdsa.curve import secp256k1
+from ..utils.commitments import commitment
+from ..utils.utils import mod_hash, ModP
+from ..utils.elliptic_curve_hash import elliptic_hash
+from ..rangeproofs import AggregNIRangeProver, BatchRangeVerifier
+
+
+CURVE = secp256k1
+p = secp256k1.q
+
+
+class BatchRangeProofTest(unittest.TestCase):
+    def setUp(self):
+        seeds = [os.urandom(10) for _ in range(5)]
+        self.gs = [elliptic_hash(str(i).encode() + seeds[0], CURVE) for i in range(64)]
+        self.hs = [elliptic_hash(str(i).encode() + seeds[1], CURVE) for i in range(64)]
+        self.g = elliptic_hash(seeds[2], CURVE)
+        self.h = elliptic_hash(seeds[3], CURVE)
+        self.u = elliptic_hash(seeds[4], CURVE)
+
+    def prove(self, vs, n, include_transcript=True):
+        m = len(vs)
+        seed = os.urandom(10)
+        gammas = [mod_hash(os.urandom(10), p) for _ in range(m)]
+        Vs = [commitment(self.g, self.h, vs[i], gammas[i]) for i in range(m)]
+        Prov = AggregNIRangeProver(
+            vs,
+            n,
+            self.g,
+            self.h,
+            self.gs[: n * m],
+            self.hs[: n * m],
+            gammas,
+            self.u,
+            CURVE,
+            seed,
+            include_transcript=include_transcript,
+        )
+        return Vs, Prov.prove()
+
+    def test_batch(self):
+        for n, ms in [(8, [1, 2, 8]), (16, [1, 4, 2]), (32, [2])]:
+            proofs = [
+                self.prove([ModP(randint(0, 2 ** n - 1), p) for _ in range(m)], n)
+                for m in ms
+            ]
+            Verif = BatchRangeVerifier(n, self.g, self.h, self.gs, self.hs, self.u, proofs)
+            self.assertTrue(Verif.verify())
+
+    def test_batch_chunked(self):
+        proofs = [
+            self.prove([ModP(randint(0, 2 ** 8 - 1), p) for _ in range(m)], 8)
+            for m in [1, 4]
+        ]
+        Verif = BatchRangeVerifier(
+            8, self.g, self.h, self.gs, self.hs, self.u, proofs, chunk_size=20
+        )
+        self.assertTrue(Verif.verify())
+
+    def test_batch_without_transcript(self):
+        proofs = [
+            self.prove([ModP(randint(0, 2 ** 8 - 1), p) for _ in range(m)], 8, False)
+            for m in [1, 2]
+        ]
+        proofs.append(self.prove([ModP(randint(0, 2 ** 8 - 1), p)], 8))
+        Verif = BatchRangeVerifier(8, self.g, self.h, self.gs, self.hs, self.u, proofs)
+        self.assertTrue(Verif.verify())
+
+    def test_batch_one_invalid(self):
+        proofs = [
+            self.prove([ModP(randint(0, 2 ** 16 - 1), p) for _ in range(2)], 16)
+            for _ in range(3)
+        ]
+        proofs.append(self.prove([ModP(2 ** 16, p), ModP(1, p)], 16))
+        Verif = BatchRangeVerifier(16, self.g, self.h, self.gs, self.hs, self.u, proofs)
+        with self.assertRaisesRegex(Exception, "Proof invalid"):
+            Verif.verify()
+        Verif = BatchRangeVerifier(
+            16, self.g, self.h, self.gs, self.hs, self.u, proofs, chunk_size=20
+        )
+        with self.assertRaisesRegex(Exception, "Proof invalid"):
+            Verif.verify()
+
+    def test_batch_invalid_commitment(self):
+        Vs, proof = self.prove([ModP(randint(0, 2 ** 16 - 1), p)], 16)
+        proofs = [self.prove([ModP(3, p)], 16), ([Vs[0] + self.g], proof)]
+        Verif = BatchRangeVerifier(16, self.g, self.h, self.gs, self.hs, self.u, proofs)
+        with self.assertRaisesRegex(Exception, "Proof invalid"):
+            Verif.verify()
+
+    def test_batch_too_many_bits(self):
+        # -1 is in [0, 2^64), not in the intended range [0, 2^16)
+        proofs = [self.prove([ModP(randint(0, 2 ** 16 - 1), p)], 16)]
+        proofs.append(self.prove([ModP(2 ** 64 - 1, p)], 64))
+        Verif = BatchRangeVerifier(16, self.g, self.h, self.gs, self.hs, self.u, proofs)
+        with self.assertRaisesRegex(Exception, "Proof invalid"):
+            Verif.verify()
+
+    def test_batch_empty_commitments(self):
+        Vs, proof = self.prove([ModP(randint(0, 2 ** 16 - 1), p)], 16)
+        Verif = BatchRangeVerifier(
+            16, self.g, self.h, self.gs, self.hs, self.u, [([], proof)]
+        )
+        with self.assertRaisesRegex(Exception, "Proof invalid"):
+            Verif.verify()
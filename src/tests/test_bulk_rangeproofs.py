@@ -0,0 +1,86 @@
+import unittest
+import os
+from random import randint
+from fastecdsa.curve import secp256k1
+from ..utils.commitments import commitment
+from ..utils.utils import mod_hash, ModP
+from ..utils.elliptic_curve_hash import elliptic_hash
+from ..utils.generators import PrecomputedGenerators
+from ..utils.parallel import enable_parallel_multiexp, disable_parallel_multiexp
+from ..rangeproofs import BulkRangeProver, NIRangeProver, RangeVerifier
+
+
+CURVE = secp256k1
+p = secp256k1.q
+
+
+class BulkRangeProofTest(unittest.TestCase):
+    def setUp(self):
+        seeds = [os.urandom(10) for _ in range(5)]
+        self.n = 8
+        gs = [elliptic_hash(str(i).encode() + seeds[0], CURVE) for i in range(self.n)]
+        hs = [elliptic_hash(str(i).encode() + seeds[1], CURVE) for i in range(self.n)]
+        g = elliptic_hash(seeds[2], CURVE)
+        h = elliptic_hash(seeds[3], CURVE)
+        u = elliptic_hash(seeds[4], CURVE)
+        self.gens = PrecomputedGenerators(gs, hs, g, h, u)
+        self.values = [
+            (ModP(randint(0, 2 ** self.n - 1), p), mod_hash(os.urandom(10), p))
+            for _ in range(7)
+        ]
+        self.seeds = [os.urandom(10) for _ in self.values]
+
+    def tearDown(self):
+        self.gens.release()
+
+    def check(self, proofs, include_transcript=True):
+        gens = self.gens
+        self.assertEqual(sorted(i for i, _ in proofs), list(range(len(self.values))))
+        for i, proof in proofs:
+            v, gamma = self.values[i]
+            expected = NIRangeProver(
+                v,
+                self.n,
+                gens.g,
+                gens.h,
+                gens.gs,
+                gens.hs,
+                gamma,
+                gens.u,
+                CURVE,
+                self.seeds[i],
+                include_transcript=include_transcript,
+            ).prove()
+            with self.subTest(i=i):
+                self.assertEqual(proof.to_bytes(), expected.to_bytes())
+                V = commitment(gens.g, gens.h, v, gamma)
+                Verif = RangeVerifier(V, gens.g, gens.h, gens.gs, gens.hs, gens.u, proof)
+                self.assertTrue(Verif.verify())
+
+    def test_ordered(self):
+        with BulkRangeProver(self.gens, self.n, processes=2, chunksize=3) as Prov:
+            proofs = list(Prov.prove(self.values, seeds=self.seeds))
+        self.assertEqual([i for i, _ in proofs], list(range(len(self.values))))
+        self.check(proofs)
+
+    def test_as_completed(self):
+        with BulkRangeProver(
+            self.gens, self.n, processes=2, chunksize=2, include_transcript=False
+        ) as Prov:
+            proofs = list(Prov.prove(self.values, ordered=False, seeds=self.seeds))
+        self.check(proofs, include_transcript=False)
+
+    def test_single_process(self):
+        with BulkRangeProver(self.gens, self.n, processes=1) as Prov:
+            proofs = list(Prov.prove(self.values, seeds=self.seeds))
+        self.check(proofs)
+
+    def test_parallel_multiexp(self):
+        # Workers compute their multiexps themselves instead of starting pools of their own
+        enable_parallel_multiexp(2, threshold=8)
+        try:
+            with BulkRangeProver(self.gens, self.n, processes=2, chunksize=3) as Prov:
+                proofs = list(Prov.prove(self.values, seeds=self.seeds))
+        finally:
+            disable_parallel_multiexp()
+        self.check(proofs)
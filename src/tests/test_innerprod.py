@@ -3,7 +3,9 @@ import os
 from random import randint
 from fastecdsa.curve import secp256k1, Curve
 from ..innerproduct.inner_product_prover import NIProver, FastNIProver2
-from ..innerproduct.inner_product_verifier import Verifier1, Verifier2
+from ..innerproduct.inner_product_verifier import Verifier1, Verifier2, Proof1, Proof2
+from ..innerproduct.folding import use_deferred_folding
+from ..utils.generators import PrecomputedGenerators
 from ..utils.commitments import vector_commitment
 from ..utils.utils import mod_hash, inner_product
 from ..utils.elliptic_curve_hash import elliptic_hash
@@ -12,6 +14,29 @@ from ..utils.elliptic_curve_hash import elliptic_hash
 CURVE: Curve = secp256k1
 
 
+def _instance(N):
+    seeds = [os.urandom(10) for _ in range(6)]
+    p = CURVE.q
+    g = [elliptic_hash(str(i).encode() + seeds[0], CURVE) for i in range(N)]
+    h = [elliptic_hash(str(i).encode() + seeds[1], CURVE) for i in range(N)]
+    u = elliptic_hash(seeds[2], CURVE)
+    a = [mod_hash(str(i).encode() + seeds[3], p) for i in range(N)]
+    b = [mod_hash(str(i).encode() + seeds[4], p) for i in range(N)]
+    return g, h, u, a, b, seeds[5]
+
+
+def protocol_2_args(N):
+    """Returns the arguments g, h, u, P, a, b of a random instance of Protocol 2 of size N"""
+    g, h, u, a, b, _ = _instance(N)
+    return g, h, u, vector_commitment(g, h, a, b) + inner_product(a, b) * u, a, b
+
+
+def protocol_1_args(N):
+    """Returns the arguments g, h, u, P, c, a, b of a random instance of Protocol 1 of size N, and a seed"""
+    g, h, u, a, b, seed = _instance(N)
+    return g, h, u, vector_commitment(g, h, a, b), inner_product(a, b), a, b, seed
+
+
 class Protocol2Test(unittest.TestCase):
     def test_protocol_2(self):
         for i in range(9):
@@ -29,6 +54,52 @@ class Protocol2Test(unittest.TestCase):
             Verif = Verifier2(g, h, u, P, proof)
             with self.subTest(seeds=seeds, N=N):
                 self.assertTrue(Verif.verify())
+                self.assertEqual([t["n"] for t in Prov.timings], [N >> k for k in range(i)])
+
+    def test_generator_folding_protocol_2(self):
+        for N in [1, 2, 16]:
+            g, h, u, P, a, b = protocol_2_args(N)
+            proof = FastNIProver2(g, h, u, P, a, b, CURVE, generator_folding="fold").prove()
+            for tables in [False, True]:
+                generators = PrecomputedGenerators(g, h, u, u, u) if tables else None
+                Prov = FastNIProver2(g, h, u, P, a, b, CURVE, generator_folding="deferred")
+                with self.subTest(N=N, tables=tables):
+                    self.assertEqual(Prov.prove().to_bytes(), proof.to_bytes())
+                if generators is not None:
+                    generators.release()
+            self.assertTrue(Verifier2(g, h, u, P, proof).verify())
+        with self.assertRaisesRegex(Exception, "Unknown generator folding"):
+            use_deferred_folding("auto")
+
+    def test_serialization_protocol_2(self):
+        for N in [1, 16]:
+            g, h, u, P, a, b = protocol_2_args(N)
+            data = FastNIProver2(g, h, u, P, a, b, CURVE).prove().to_bytes()
+            proof = Proof2.from_bytes(memoryview(data))
+            with self.subTest(N=N):
+                self.assertEqual(proof.to_bytes(), data)
+                self.assertTrue(Verifier2(g, h, u, P, proof).verify())
+
+    def test_without_transcript_protocol_2(self):
+        g, h, u, P, a, b = protocol_2_args(16)
+        Prov = FastNIProver2(g, h, u, P, a, b, CURVE, include_transcript=False)
+        data = Prov.prove().to_bytes()
+        proof = Proof2.from_bytes(data, with_transcript=False)
+        self.assertIsNone(proof.xs)
+        self.assertTrue(Verifier2(g, h, u, P, proof).verify())
+        proof.Ls[0], proof.Rs[0] = proof.Rs[0], proof.Ls[0]
+        with self.assertRaisesRegex(Exception, "Proof invalid"):
+            Verifier2(g, h, u, P, proof).verify()
+
+    def test_legacy_transcript_protocol_2(self):
+        g, h, u, P, a, b = protocol_2_args(16)
+        Prov = FastNIProver2(g, h, u, P, a, b, CURVE, legacy_transcript=True)
+        proof = Prov.prove()
+        Verif = Verifier2(g, h, u, P, proof, legacy_transcript=True)
+        self.assertTrue(Verif.verify())
+        Verif = Verifier2(g, h, u, P, proof)
+        with self.assertRaisesRegex(Exception, "Proof invalid"):
+            Verif.verify()
 
     def test_prover_cheating_false_P_protocol2(self):
         seeds = [os.urandom(10) for _ in range(6)]
@@ -135,6 +206,41 @@ class InnerProductArgumentTest(unittest.TestCase):
             with self.subTest(N=N, seeds=seeds):
                 self.assertTrue(Verif.verify())
 
+    def test_serialization(self):
+        g, h, u, P, c, a, b, seed = protocol_1_args(16)
+        data = NIProver(g, h, u, P, c, a, b, CURVE, seed).prove().to_bytes()
+        proof = Proof1.from_bytes(data)
+        self.assertEqual(proof.to_bytes(), data)
+        self.assertTrue(Verifier1(g, h, u, P, c, proof).verify())
+        corrupted = bytearray(data)
+        corrupted[0] = 5
+        with self.assertRaisesRegex(Exception, "Invalid proof encoding"):
+            Proof1.from_bytes(corrupted)
+
+    def test_legacy_transcript(self):
+        g, h, u, P, c, a, b, seed = protocol_1_args(16)
+        Prov = NIProver(g, h, u, P, c, a, b, CURVE, seed, legacy_transcript=True)
+        proof = Prov.prove()
+        Verif = Verifier1(g, h, u, P, c, proof, legacy_transcript=True)
+        self.assertTrue(Verif.verify())
+        Verif = Verifier1(g, h, u, P, c, proof)
+        with self.assertRaisesRegex(Exception, "Proof invalid"):
+            Verif.verify()
+
+    def test_without_transcript(self):
+        g, h, u, P, c, a, b, seed = protocol_1_args(16)
+        Prov = NIProver(g, h, u, P, c, a, b, CURVE, seed, include_transcript=False)
+        proof = Prov.prove()
+        self.assertIsNone(proof.transcript)
+        self.assertIsNone(proof.proof2.transcript)
+        data = proof.to_bytes()
+        self.assertEqual(len(data), 2 * 32 + 1 + 2 * 4 * 33)
+        proof = Proof1.from_bytes(data, with_transcript=False)
+        self.assertTrue(Verifier1(g, h, u, P, c, proof).verify())
+        Verif = Verifier1(g, h, u, P, c + 1, proof)
+        with self.assertRaisesRegex(Exception, "Proof invalid"):
+            Verif.verify()
+
     def test_prover_cheating_false_c(self):
         seeds = [os.urandom(10) for _ in range(6)]
         p = CURVE.q
@@ -0,0 +1,236 @@
+import unittest
+import os
+import tempfile
+from random import randint
+from fastecdsa.curve import secp256k1
+from fastecdsa.point import Point
+
+from ..pippenger import (
+    Pippenger,
+    PipSECP256k1,
+    MultiexpDispatcher,
+    MultiexpSECP256k1,
+    load_tuning_secp256k1,
+)
+from ..pippenger.pippenger import signed_digits
+from ..pippenger.group import MultIntModP, EC, ECJacobian
+from ..pippenger.glv import GLVPippenger, glv_decompose, LAMBDA
+from ..pippenger.modp import ModP
+
+CURVE = secp256k1
+
+
+class PippengerTest(unittest.TestCase):
+    def test_multiexp_modp(self):
+        p = 1000003
+        Pip = Pippenger(MultIntModP(p, p - 1))
+        for N in [1, 2, 3, 10, 100, 500]:
+            gs = [ModP(randint(1, p - 1), p) for _ in range(N)]
+            es = [randint(0, 2 * p) for _ in range(N)]
+            expected = 1
+            for g, e in zip(gs, es):
+                expected = expected * pow(g.x, e, p) % p
+            with self.subTest(N=N):
+                self.assertEqual(Pip.multiexp(gs, es).x, expected)
+
+    def test_multiexp_ec(self):
+        for N in [1, 2, 5, 33]:
+            gs = [randint(1, CURVE.q) * CURVE.G for _ in range(N)]
+            es = [randint(0, CURVE.q) for _ in range(N)]
+            expected = Point.IDENTITY_ELEMENT
+            for g, e in zip(gs, es):
+                expected += e * g
+            with self.subTest(N=N):
+                self.assertEqual(PipSECP256k1.multiexp(gs, es), expected)
+
+    def test_multiexp_affine_ec(self):
+        Pip = Pippenger(EC(CURVE))
+        gs = [randint(1, CURVE.q) * CURVE.G for _ in range(5)]
+        es = [randint(0, CURVE.q) for _ in range(5)]
+        self.assertEqual(Pip.multiexp(gs, es), PipSECP256k1.multiexp(gs, es))
+
+    def test_jacobian(self):
+        G = ECJacobian(CURVE)
+        g = randint(1, CURVE.q) * CURVE.G
+        h = randint(1, CURVE.q) * CURVE.G
+        x, y = G.lift(g), G.lift(h)
+        # Representations with Z != 1
+        x2, y2 = G.square(x), G.mult(G.square(y), G.lift(-h))
+        self.assertEqual(G.normalize(G.mult(x, y)), g + h)
+        self.assertEqual(G.normalize(G.mult(x2, y2)), 2 * g + h)
+        self.assertEqual(G.normalize(G.mult(x2, x2)), 4 * g)
+        self.assertEqual(G.normalize(G.mult(x, G.lift(-g))), Point.IDENTITY_ELEMENT)
+        self.assertEqual(G.normalize(G.mult(G.unit, y2)), h)
+        self.assertEqual(G.lift(Point.IDENTITY_ELEMENT), G.unit)
+        self.assertTrue(G.eq(G.mult(x, x), G.square(x)))
+        self.assertTrue(G.eq(y2, y))
+        self.assertFalse(G.eq(x2, x))
+        self.assertFalse(G.eq(G.unit, x))
+        self.assertTrue(G.eq(G.unit, G.square(G.unit)))
+
+    def test_glv_decompose(self):
+        for k in [0, 1, LAMBDA, CURVE.q - 1] + [randint(0, CURVE.q - 1) for _ in range(100)]:
+            k1, k2 = glv_decompose(k)
+            with self.subTest(k=k):
+                self.assertEqual((k1 + k2 * LAMBDA) % CURVE.q, k)
+                self.assertLessEqual(abs(k1).bit_length(), 129)
+                self.assertLessEqual(abs(k2).bit_length(), 129)
+
+    def test_multiexp_glv(self):
+        Pip = Pippenger(ECJacobian(CURVE))
+        GLVPip = GLVPippenger(ECJacobian(CURVE))
+        for N in [1, 2, 40]:
+            gs = [randint(1, CURVE.q) * CURVE.G for _ in range(N)]
+            es = [randint(0, CURVE.q - 1) for _ in range(N - 1)] + [CURVE.q - 1]
+            with self.subTest(N=N):
+                self.assertEqual(GLVPip.multiexp(gs, es), Pip.multiexp(gs, es))
+        self.assertEqual(GLVPip.multiexp([CURVE.G], [0]), Point.IDENTITY_ELEMENT)
+
+    def test_multiexp_edge_cases(self):
+        g = CURVE.G
+        self.assertEqual(PipSECP256k1.multiexp([], []), Point.IDENTITY_ELEMENT)
+        self.assertEqual(PipSECP256k1.multiexp([g], [0]), Point.IDENTITY_ELEMENT)
+        self.assertEqual(PipSECP256k1.multiexp([g], [CURVE.q]), Point.IDENTITY_ELEMENT)
+        self.assertEqual(PipSECP256k1.multiexp([g, g], [1, -1]), Point.IDENTITY_ELEMENT)
+        self.assertEqual(PipSECP256k1.multiexp([g], [-1]), -g)
+        with self.assertRaises(Exception):
+            PipSECP256k1.multiexp([g], [1, 2])
+
+    def test_signed_digits(self):
+        for c in [1, 2, 5, 8]:
+            for e in [0, 1, 2 ** c - 1, 2 ** 40 - 1, randint(0, CURVE.q)]:
+                digits = signed_digits(e, c)
+                with self.subTest(c=c, e=e):
+                    self.assertEqual(sum(d << (c * k) for k, d in enumerate(digits)), e)
+                    self.assertTrue(all(abs(d) <= 2 ** (c - 1) for d in digits))
+
+    def test_multiexp_signed(self):
+        gs = [randint(1, CURVE.q) * CURVE.G for _ in range(40)]
+        es = [CURVE.q - randint(1, 2 ** 64) for _ in range(20)] + [
+            -randint(1, 2 ** 64) for _ in range(20)
+        ]
+        expected = Point.IDENTITY_ELEMENT
+        for g, e in zip(gs, es):
+            expected += e * g
+        for Pip in [Pippenger(EC(CURVE)), Pippenger(ECJacobian(CURVE))]:
+            for fixed in [0, 10, 40]:
+                Pip.precompute(gs[:fixed])
+                with self.subTest(group=type(Pip.G).__name__, fixed=fixed):
+                    self.assertEqual(Pip.multiexp(gs, es), expected)
+
+    def test_multiexp_stream(self):
+        Pip = Pippenger(ECJacobian(CURVE))
+        gs = [randint(1, CURVE.q) * CURVE.G for _ in range(30)]
+        es = [randint(0, CURVE.q) for _ in range(30)]
+        expected = Pip.multiexp(gs, es)
+        Pip.precompute(gs[:5])
+        for chunk_size in [1, 7, 30, 100]:
+            with self.subTest(chunk_size=chunk_size):
+                pairs = ((g, e) for g, e in zip(gs, es))
+                self.assertEqual(Pip.multiexp_stream(pairs, chunk_size), expected)
+        self.assertEqual(Pip.multiexp_stream(iter([])), Point.IDENTITY_ELEMENT)
+
+    def test_is_unit(self):
+        Pip = Pippenger(ECJacobian(CURVE))
+        gs = [randint(1, CURVE.q) * CURVE.G for _ in range(20)]
+        es = [randint(0, CURVE.q) for _ in range(20)]
+        # Appending the inverse of the multiexp makes it the unit
+        unit_gs, unit_es = gs + [Pip.multiexp(gs, es)], es + [CURVE.q - 1]
+        self.assertTrue(Pip.is_unit(unit_gs, unit_es))
+        self.assertFalse(Pip.is_unit(gs, es))
+        self.assertTrue(Pip.is_unit([], []))
+        self.assertTrue(Pip.is_unit_stream(zip(unit_gs, unit_es), 7))
+        self.assertFalse(Pip.is_unit_stream(zip(gs, es), 7))
+        for chunk_size in [None, 5]:
+            Multiexp = MultiexpDispatcher(Pip, chunk_size=chunk_size)
+            with self.subTest(chunk_size=chunk_size):
+                self.assertTrue(Multiexp.is_unit(unit_gs, unit_es))
+                self.assertFalse(Multiexp.is_unit(gs, es))
+
+    def test_multiexp_fixed_base(self):
+        p = 1000003
+        Pip = Pippenger(MultIntModP(p, p - 1))
+        gs = [ModP(randint(1, p - 1), p) for _ in range(50)]
+        Pip.precompute(gs[:30])
+        for N in [1, 20, 50]:
+            es = [randint(0, 2 * p) for _ in range(N)]
+            expected = 1
+            for g, e in zip(gs, es):
+                expected = expected * pow(g.x, e, p) % p
+            with self.subTest(N=N):
+                self.assertEqual(Pip.multiexp(gs[:N], es).x, expected)
+        Pip.release(gs)
+        self.assertEqual(Pip.tables, {})
+
+
+class MultiexpDispatcherTest(unittest.TestCase):
+    def test_chunk_size(self):
+        gs = [randint(1, CURVE.q) * CURVE.G for _ in range(20)]
+        es = [randint(0, CURVE.q - 1) for _ in range(20)]
+        dispatcher = MultiexpDispatcher(PipSECP256k1, chunk_size=6)
+        self.assertEqual(dispatcher.multiexp(gs, es), PipSECP256k1.multiexp(gs, es))
+
+    def test_engines(self):
+        dispatcher = MultiexpDispatcher(PipSECP256k1)
+        for N in [0, 1, 2, 9]:
+            gs = [randint(1, CURVE.q) * CURVE.G for _ in range(N)]
+            es = [randint(0, CURVE.q - 1) for _ in range(N)]
+            expected = PipSECP256k1.multiexp(gs, es)
+            for name, engine in dispatcher.engines.items():
+                with self.subTest(N=N, engine=name):
+                    self.assertEqual(engine(gs, es), expected)
+
+    def test_engines_modp(self):
+        p = 1000003
+        dispatcher = MultiexpDispatcher(Pippenger(MultIntModP(p, p - 1)))
+        gs = [ModP(randint(1, p - 1), p) for _ in range(7)]
+        es = [randint(0, p - 2) for _ in range(7)]
+        expected = 1
+        for g, e in zip(gs, es):
+            expected = expected * pow(g.x, e, p) % p
+        for name, engine in dispatcher.engines.items():
+            with self.subTest(engine=name):
+                self.assertEqual(engine(gs, es).x, expected)
+
+    def test_dispatch(self):
+        dispatcher = MultiexpDispatcher(
+            PipSECP256k1, [(2, "naive"), (4, "straus"), (None, "pippenger")]
+        )
+        self.assertEqual(
+            [dispatcher.engine(N) for N in [1, 2, 3, 4, 5, 100]],
+            ["naive", "naive", "straus", "straus", "pippenger", "pippenger"],
+        )
+        calls = []
+        dispatcher.register("straus", lambda gs, es: calls.append(es) or CURVE.G)
+        self.assertEqual(dispatcher.multiexp([CURVE.G] * 3, [1, 2, CURVE.q + 3]), CURVE.G)
+        self.assertEqual(calls, [[1, 2, 3]])
+
+    def test_autotune(self):
+        dispatcher = MultiexpDispatcher(PipSECP256k1)
+        gs = [randint(1, CURVE.q) * CURVE.G for _ in range(4)]
+        crossovers = dispatcher.autotune(gs, sizes=(1, 4), repeat=1)
+        self.assertIsNone(crossovers[-1][0])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "tuning", "multiexp.json")
+            dispatcher.save(path)
+            loaded = MultiexpDispatcher(PipSECP256k1)
+            self.assertTrue(loaded.load(path))
+            self.assertEqual(loaded.crossovers, crossovers)
+            with open(path, "w") as f:
+                f.write('{"crossovers": [[null, "unknown"]]}')
+            self.assertFalse(loaded.load(path))
+            self.assertFalse(loaded.load(os.path.join(directory, "missing.json")))
+
+    @unittest.skipIf("BULLETPROOFS_MULTIEXP_TUNING" in os.environ, "tuning loaded on import")
+    def test_load_tuning(self):
+        defaults = [(1, "naive"), (32, "straus"), (None, "pippenger")]
+        self.assertEqual(MultiexpSECP256k1.crossovers, defaults)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "multiexp.json")
+            with open(path, "w") as f:
+                f.write('{"crossovers": [[null, "pippenger"]]}')
+            try:
+                self.assertTrue(load_tuning_secp256k1(path))
+                self.assertEqual(MultiexpSECP256k1.crossovers, [(None, "pippenger")])
+            finally:
+                MultiexpSECP256k1.crossovers = defaults
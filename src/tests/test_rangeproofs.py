@@ -8,12 +8,29 @@ from ..utils.commitments import vector_commitment, commitment
 from ..utils.utils import mod_hash, inner_product, ModP
 from ..utils.elliptic_curve_hash import elliptic_hash
 from ..rangeproofs import NIRangeProver, RangeVerifier
+from ..rangeproofs.rangeproof_verifier import Proof
 
 
 CURVE = secp256k1
 p = CURVE.q
 
 
+def proof_args(v, n):
+    """
+    Returns the arguments of an NIRangeProver proving that v has n bits on random generators,
+    and the arguments V, g, h, gs, hs, u of its verifier
+    """
+    seeds = [os.urandom(10) for _ in range(7)]
+    gs = [elliptic_hash(str(i).encode() + seeds[0], CURVE) for i in range(n)]
+    hs = [elliptic_hash(str(i).encode() + seeds[1], CURVE) for i in range(n)]
+    g = elliptic_hash(seeds[2], CURVE)
+    h = elliptic_hash(seeds[3], CURVE)
+    u = elliptic_hash(seeds[4], CURVE)
+    gamma = mod_hash(seeds[5], p)
+    V = commitment(g, h, v, gamma)
+    return (v, n, g, h, gs, hs, gamma, u, CURVE, seeds[6]), (V, g, h, gs, hs, u)
+
+
 class RangeProofTest(unittest.TestCase):
     def test_different_seeds(self):
         for _ in range(10):
@@ -112,3 +129,76 @@ class RangeProofTest(unittest.TestCase):
         with self.subTest(v=v, n=n, randind=randind):
             with self.assertRaisesRegex(Exception, "Proof invalid"):
                 Verif.verify()
+
+    def test_single_multiexp(self):
+        for i in range(0, 7, 2):
+            v, n = ModP(randint(0, 2 ** (2 ** i) - 1), p), 2 ** i
+            args, verifier_args = proof_args(v, n)
+            proof = NIRangeProver(*args).prove()
+            with self.subTest(v=v, n=n):
+                Verif = RangeVerifier(*verifier_args, proof)
+                self.assertTrue(Verif.verify(single_multiexp=True))
+                V, g, h, gs, hs, u = verifier_args
+                Verif = RangeVerifier(V + g, g, h, gs, hs, u, proof)
+                with self.assertRaisesRegex(Exception, "Proof invalid"):
+                    Verif.verify(single_multiexp=True)
+
+    def test_serialization(self):
+        args, verifier_args = proof_args(ModP(randint(0, 2 ** 16 - 1), p), 16)
+        data = NIRangeProver(*args).prove().to_bytes()
+        buf = memoryview(bytearray(b"header" + data))
+        proof = Proof.from_bytes(buf[6:])
+        self.assertEqual(proof.to_bytes(), data)
+        Verif = RangeVerifier(*verifier_args, proof)
+        self.assertTrue(Verif.verify())
+        with self.assertRaisesRegex(Exception, "Invalid proof encoding"):
+            Proof.from_bytes(data[:-1])
+        with self.assertRaisesRegex(Exception, "Invalid proof encoding"):
+            Proof.from_bytes(data + b"\x00")
+
+    def test_tampered_transcript(self):
+        args, verifier_args = proof_args(ModP(randint(0, 2 ** 8 - 1), p), 8)
+        proof = NIRangeProver(*args).prove()
+        data = proof.to_bytes()
+        proof2 = proof.innerProof.proof2
+        # Last byte of each transcript, and start_transcript which precedes the length of proof2's
+        offsets = [
+            data.index(t) + len(t) - 1
+            for t in [proof.transcript, proof.innerProof.transcript, proof2.transcript]
+        ]
+        offsets.append(data.index(proof2.transcript) - 5)
+        for offset in offsets:
+            tampered = bytearray(data)
+            tampered[offset] ^= 1
+            with self.subTest(offset=offset):
+                Verif = RangeVerifier(*verifier_args, Proof.from_bytes(bytes(tampered)))
+                with self.assertRaisesRegex(Exception, "Proof invalid"):
+                    Verif.verify()
+                with self.assertRaisesRegex(Exception, "Proof invalid"):
+                    Verif.verify(single_multiexp=True)
+
+    def test_without_transcript(self):
+        args, verifier_args = proof_args(ModP(randint(0, 2 ** 16 - 1), p), 16)
+        data = NIRangeProver(*args, include_transcript=False).prove().to_bytes()
+        self.assertEqual(len(data), 5 * 32 + 1 + (4 + 2 * 4) * 33)
+        proof = Proof.from_bytes(data, with_transcript=False)
+        self.assertEqual(proof.to_bytes(), data)
+        Verif = RangeVerifier(*verifier_args, proof)
+        self.assertTrue(Verif.verify())
+        self.assertTrue(Verif.verify(single_multiexp=True))
+        V, g, h, gs, hs, u = verifier_args
+        Verif = RangeVerifier(V + g, g, h, gs, hs, u, proof)
+        with self.assertRaisesRegex(Exception, "Proof invalid"):
+            Verif.verify()
+        with self.assertRaisesRegex(Exception, "Invalid proof encoding"):
+            Proof.from_bytes(data)
+
+    def test_legacy_transcript(self):
+        args, verifier_args = proof_args(ModP(randint(0, 2 ** 16 - 1), p), 16)
+        proof = NIRangeProver(*args, legacy_transcript=True).prove()
+        Verif = RangeVerifier(*verifier_args, proof, legacy_transcript=True)
+        self.assertTrue(Verif.verify())
+        self.assertTrue(Verif.verify(single_multiexp=True))
+        Verif = RangeVerifier(*verifier_args, proof)
+        with self.assertRaisesRegex(Exception, "Proof invalid"):
+            Verif.verify()
@@ -1,20 +1,50 @@
 import unittest
 import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool
 from random import randint
 from fastecdsa.curve import secp256k1
+from fastecdsa.point import Point
 
 from ..utils.utils import (
+    ModP,
+    batch_inverse,
+    inner_product,
     mod_hash,
     bytes_to_point,
     point_to_bytes,
     b64_to_point,
     point_to_b64,
 )
-from ..utils.elliptic_curve_hash import elliptic_hash
+from ..utils.elliptic_curve_hash import elliptic_hash, elliptic_hash_many
+from ..utils.generator_cache import GeneratorCache
+from ..utils.commitments import vector_commitment, bit_vector_commitment
+from ..utils.generators import PrecomputedGenerators
+from ..utils.serialization import Reader, encode_point
+from ..utils.scalar_vector import ScalarVector
+from ..utils.power_vectors import RangePowers, s_vector
+from ..utils.limb_vector import LimbVector, to_vectors, to_scalar_vector, np
+from ..utils import backend, limb_vector
+from ..utils.parallel import (
+    ParallelMultiexp,
+    enable_parallel_multiexp,
+    multiexp_streams,
+    process_pool,
+    submit_multiexps,
+    disable_parallel_multiexp,
+    pack_points,
+    unpack_points,
+)
+from ..pippenger import PipSECP256k1, MultiexpSECP256k1
 
 CURVE = secp256k1
 
 
+def _elliptic_hash_many_coords(msgs):
+    return [(g.x, g.y) for g in elliptic_hash_many(msgs, CURVE, processes=2)]
+
+
 class HashTest(unittest.TestCase):
     def test_mod_hash(self):
         p = 1009
@@ -35,6 +65,117 @@ class HashTest(unittest.TestCase):
             with self.subTest(msg=msg):
                 self.assertTrue(CURVE.is_point_on_curve((x.x, x.y)))
 
+    def test_elliptic_hash_many(self):
+        msgs = [os.urandom(10) for _ in range(300)]
+        expected = [elliptic_hash(msg, CURVE) for msg in msgs]
+        self.assertEqual(elliptic_hash_many(msgs, CURVE, processes=1), expected)
+        self.assertEqual(elliptic_hash_many(msgs, CURVE, processes=2), expected)
+        # Daemonic pool workers cannot start a pool of their own
+        with Pool(1) as pool:
+            coords = pool.apply(_elliptic_hash_many_coords, (msgs,))
+        self.assertEqual(coords, [(g.x, g.y) for g in expected])
+
+
+class InverseTest(unittest.TestCase):
+    def test_batch_inverse(self):
+        p = CURVE.q
+        for N in [0, 1, 2, 17]:
+            xs = [ModP(randint(1, p - 1), p) for _ in range(N)]
+            with self.subTest(N=N):
+                self.assertEqual(batch_inverse(xs), [x.inv() for x in xs])
+
+    def test_batch_inverse_zero(self):
+        p = CURVE.q
+        with self.assertRaisesRegex(Exception, "modular inverse does not exist"):
+            batch_inverse([ModP(2, p), ModP(0, p)])
+
+    def test_backends(self):
+        p = CURVE.q
+        initial = backend.GMPY2
+        x = ModP(randint(1, p - 1), p)
+        e = randint(0, p)
+        try:
+            for enabled in [False, True]:
+                with self.subTest(gmpy2=backend.use_gmpy2(enabled)):
+                    self.assertEqual((x ** e).x, pow(x.x, e, p))
+                    self.assertIs(type((x ** e).x), int)
+                    self.assertEqual((x * x.inv()).x, 1)
+                    self.assertIs(type(x.inv().x), int)
+                    with self.assertRaisesRegex(Exception, "modular inverse does not exist"):
+                        ModP(6, 9).inv()
+        finally:
+            backend.use_gmpy2(initial)
+
+
+class ScalarVectorTest(unittest.TestCase):
+    def test_operations(self):
+        p = CURVE.q
+        N = 16
+        a = [ModP(randint(0, p - 1), p) for _ in range(N)]
+        b = [ModP(randint(0, p - 1), p) for _ in range(N)]
+        x = ModP(randint(0, p - 1), p)
+        va = ScalarVector.from_scalars(a, p)
+        vb = ScalarVector.from_scalars(b, p)
+        self.assertEqual(list(va + vb), [ai + bi for ai, bi in zip(a, b)])
+        self.assertEqual(list(va - vb), [ai - bi for ai, bi in zip(a, b)])
+        self.assertEqual(list(va * vb), [ai * bi for ai, bi in zip(a, b)])
+        self.assertEqual(list(va - x), [ai - x for ai in a])
+        self.assertEqual(list(va * x), [x * ai for ai in a])
+        self.assertEqual(list(va.mul_add(x, b)), [ai + x * bi for ai, bi in zip(a, b)])
+        self.assertEqual(va.inner_product(vb), inner_product(a, b))
+        self.assertEqual(list(ScalarVector.powers(x, 4, p)), [x ** i for i in range(4)])
+        self.assertEqual(list(va[3:5]), a[3:5])
+        xs = va.xs
+        self.assertIs(va.fold(x, x.inv()), va)
+        self.assertIs(va.xs, xs)
+        self.assertEqual(list(va), [x * a[i] + x.inv() * a[N // 2 + i] for i in range(N // 2)])
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class LimbVectorTest(unittest.TestCase):
+    def test_operations(self):
+        for p in [1000003, CURVE.p, CURVE.q]:
+            N = 33
+            a = [ModP(randint(0, p - 1), p) for _ in range(N)]
+            b = [ModP(randint(0, p - 1), p) for _ in range(N)]
+            bits = [randint(0, 1) for _ in range(N)]
+            x = ModP(randint(0, p - 1), p)
+            va, vb = ScalarVector.from_scalars(a, p), ScalarVector.from_scalars(b, p)
+            la, lb = LimbVector.from_scalars(va, p), LimbVector.from_scalars(b, p)
+            with self.subTest(p=p):
+                self.assertEqual(la.reduced(), va.reduced())
+                self.assertEqual((la + lb).reduced(), (va + vb).reduced())
+                self.assertEqual((la - lb).reduced(), (va - vb).reduced())
+                self.assertEqual((la * lb).reduced(), (va * vb).reduced())
+                self.assertEqual((la - x).reduced(), (va - x).reduced())
+                self.assertEqual((la * x).reduced(), (va * x).reduced())
+                self.assertEqual(la.mul_add(x, lb).reduced(), va.mul_add(x, vb).reduced())
+                self.assertEqual(la.inner_product(lb), va.inner_product(vb))
+                self.assertEqual(la.sum(), va.sum())
+                self.assertEqual(LimbVector.from_bits(bits, p).reduced(), bits)
+                # Long chains of lazy operations stay within the limbs
+                lc, vc = la, va
+                for _ in range(100):
+                    lc, vc = lc + la - lb, vc + va - vb
+                    lc, vc = lc * lb + lc, vc * vb + vc
+                self.assertEqual(lc.reduced(), vc.reduced())
+                self.assertEqual(to_scalar_vector(lc).reduced(), vc.reduced())
+
+    def test_to_vectors(self):
+        p = CURVE.q
+        vectors = [ScalarVector([randint(0, p - 1) for _ in range(8)], p) for _ in range(2)]
+        self.assertIs(to_vectors(vectors), vectors)
+        min_size = limb_vector.LIMB_VECTOR_MIN_SIZE
+        limb_vector.LIMB_VECTOR_MIN_SIZE = 8
+        try:
+            converted = to_vectors(vectors)
+        finally:
+            limb_vector.LIMB_VECTOR_MIN_SIZE = min_size
+        self.assertTrue(all(isinstance(v, LimbVector) for v in converted))
+        self.assertEqual(
+            [to_scalar_vector(v).reduced() for v in converted], [v.reduced() for v in vectors]
+        )
+
 
 class ConversionTest(unittest.TestCase):
     def test_point_to_bytes(self):
@@ -51,3 +192,191 @@ class ConversionTest(unittest.TestCase):
             with self.subTest(e=e):
                 self.assertEqual(b64_to_point(point_to_b64(x)), x)
 
+    def test_reader(self):
+        g = randint(1, CURVE.q) * CURVE.G
+        reader = Reader(encode_point(g) + encode_point(Point.IDENTITY_ELEMENT))
+        self.assertEqual(reader.point(), g)
+        self.assertEqual(reader.point(), Point.IDENTITY_ELEMENT)
+        reader.end()
+        # The smallest abscissa of a point, encoded as x + p
+        x = next(x for x in range(1, 100) if pow(x ** 3 + 7, (CURVE.p - 1) // 2, CURVE.p) == 1)
+        with self.assertRaisesRegex(Exception, "Invalid proof encoding"):
+            Reader(b"\x02" + (x + CURVE.p).to_bytes(32, "big")).point()
+        with self.assertRaisesRegex(Exception, "Invalid proof encoding"):
+            Reader((CURVE.q + 1).to_bytes(32, "big")).scalar(CURVE.q)
+
+
+class PrecomputedGeneratorsTest(unittest.TestCase):
+    def test_vector_commitment(self):
+        n = 8
+        seeds = [os.urandom(10) for _ in range(5)]
+        gs = [elliptic_hash(str(i).encode() + seeds[0], CURVE) for i in range(n)]
+        hs = [elliptic_hash(str(i).encode() + seeds[1], CURVE) for i in range(n)]
+        g = elliptic_hash(seeds[2], CURVE)
+        h = elliptic_hash(seeds[3], CURVE)
+        u = elliptic_hash(seeds[4], CURVE)
+        a = [randint(0, CURVE.q) for _ in range(n)]
+        b = [randint(0, CURVE.q) for _ in range(n)]
+        expected = vector_commitment(gs, hs, a, b)
+        gens = PrecomputedGenerators(gs, hs, g, h, u)
+        try:
+            self.assertEqual(vector_commitment(gs, hs, a, b), expected)
+            self.assertEqual(
+                vector_commitment(gs[:4], [u] * 4, a[:4], b[:4]),
+                sum([ai * gi for ai, gi in zip(a[:4], gs[:4])], sum(b[:4]) * u),
+            )
+        finally:
+            gens.release()
+
+    def test_shared_generators(self):
+        gs = [randint(1, CURVE.q) * CURVE.G for _ in range(6)]
+        g, h, u = (randint(1, CURVE.q) * CURVE.G for _ in range(3))
+        gens1 = PrecomputedGenerators(gs[:4], gs[4:], g, h, u)
+        gens2 = PrecomputedGenerators(gs[2:4], gs[:2], g, h, u)
+        gens1.release()
+        self.assertTrue(PipSECP256k1.has_tables(gens2.points()))
+        self.assertFalse(PipSECP256k1.has_tables(gs[4:]))
+        gens2.release()
+        self.assertFalse(any(PipSECP256k1.has_tables([x]) for x in gens1.points()))
+
+
+class PowerVectorsTest(unittest.TestCase):
+    def test_range_powers(self):
+        p = CURVE.q
+        for n, m in [(1, 1), (8, 1), (4, 3)]:
+            y, z = ModP(randint(1, p - 1), p), ModP(randint(1, p - 1), p)
+            powers = RangePowers(y, z, n, m, p)
+            with self.subTest(n=n, m=m):
+                self.assertEqual(list(powers.yn), [y ** i for i in range(n * m)])
+                self.assertEqual(
+                    list(powers.y_inv_n), [y.inv() ** i for i in range(n * m)]
+                )
+                self.assertEqual(list(powers.zs), [z ** (2 + j) for j in range(m)])
+                self.assertEqual(
+                    list(powers.z2n),
+                    [(z ** (2 + i // n)) * (2 ** (i % n)) for i in range(n * m)],
+                )
+                self.assertEqual(
+                    powers.delta,
+                    (z - z ** 2) * sum([y ** i for i in range(n * m)], ModP(0, p))
+                    - sum(
+                        [(z ** (j + 2)) * (2 ** n - 1) for j in range(1, m + 1)],
+                        ModP(0, p),
+                    ),
+                )
+
+    def test_s_vector(self):
+        p = CURVE.q
+        for log_n in [0, 1, 4]:
+            xs = [ModP(randint(1, p - 1), p) for _ in range(log_n)]
+            ss = s_vector(xs, p)
+            with self.subTest(log_n=log_n):
+                for i in range(2 ** log_n):
+                    expected = ModP(1, p)
+                    for j in range(log_n):
+                        bit = (i >> (log_n - 1 - j)) & 1
+                        expected *= xs[j] if bit else xs[j].inv()
+                    self.assertEqual(ss[i], expected)
+                    self.assertEqual(ss[i] * ss[2 ** log_n - 1 - i], ModP(1, p))
+
+
+class ParallelMultiexpTest(unittest.TestCase):
+    def test_pack_points(self):
+        gs = [randint(1, CURVE.q) * CURVE.G for _ in range(3)]
+        gs.append(Point.IDENTITY_ELEMENT)
+        data = pack_points(gs)
+        self.assertEqual(len(data), 64 * len(gs))
+        self.assertEqual(unpack_points(data), gs)
+
+    def test_parallel_multiexp(self):
+        gs = [randint(1, CURVE.q) * CURVE.G for _ in range(40)]
+        es = [randint(0, CURVE.q - 1) for _ in range(39)] + [ModP(3, CURVE.q)]
+        expected = PipSECP256k1.multiexp(gs, es)
+        engine = ParallelMultiexp(2)
+        try:
+            self.assertEqual(engine(gs, es), expected)
+            PipSECP256k1.precompute(gs[:10])
+            try:
+                self.assertEqual(engine(gs, es), expected)
+                self.assertEqual(
+                    engine(gs[:10], es[:10]), PipSECP256k1.multiexp(gs[:10], es[:10])
+                )
+            finally:
+                PipSECP256k1.release(gs[:10])
+        finally:
+            engine.close()
+
+    def test_multiexp_streams(self):
+        gs = [randint(1, CURVE.q) * CURVE.G for _ in range(12)]
+        es = [randint(0, CURVE.q - 1) for _ in range(12)]
+        expected = [PipSECP256k1.multiexp(gs[:5], es[:5]), PipSECP256k1.multiexp(gs, es)]
+        with ThreadPoolExecutor(2) as threads, process_pool(2) as processes:
+            for executor in [None, threads, processes]:
+                pairs_list = [zip(gs[:5], es[:5]), iter(zip(gs, es))]
+                with self.subTest(executor=executor):
+                    self.assertEqual(multiexp_streams(executor, pairs_list), expected)
+
+    def test_submit_multiexps(self):
+        gs = [randint(1, CURVE.q) * CURVE.G for _ in range(12)]
+        es = [randint(0, CURVE.q - 1) for _ in range(12)]
+        args = [(gs[:5], es[:5]), (gs, es)]
+        expected = [PipSECP256k1.multiexp(*arg) for arg in args]
+        with ThreadPoolExecutor(2) as threads, process_pool(2) as processes:
+            for executor in [None, threads, processes]:
+                with self.subTest(executor=executor):
+                    self.assertEqual(submit_multiexps(executor, args)(), expected)
+
+    def test_enable_parallel_multiexp(self):
+        gs = [randint(1, CURVE.q) * CURVE.G for _ in range(20)]
+        es = [randint(0, CURVE.q - 1) for _ in range(20)]
+        expected = PipSECP256k1.multiexp(gs, es)
+        engine = enable_parallel_multiexp(2, threshold=10)
+        try:
+            self.assertIs(MultiexpSECP256k1.parallel, engine)
+            self.assertEqual(MultiexpSECP256k1.multiexp(gs, es), expected)
+            self.assertIsNotNone(engine.executor)
+        finally:
+            disable_parallel_multiexp()
+        self.assertIsNone(MultiexpSECP256k1.parallel)
+        self.assertIsNone(engine.executor)
+
+
+class CommitmentsTest(unittest.TestCase):
+    def test_bit_vector_commitment(self):
+        for n in [1, 8, 33]:
+            gs = [randint(1, CURVE.q) * CURVE.G for _ in range(n)]
+            hs = [randint(1, CURVE.q) * CURVE.G for _ in range(n)]
+            for bits in [[0] * n, [1] * n, [randint(0, 1) for _ in range(n)]]:
+                with self.subTest(n=n, bits=bits):
+                    self.assertEqual(
+                        bit_vector_commitment(gs, hs, bits),
+                        vector_commitment(gs, hs, bits, [b - 1 for b in bits]),
+                    )
+
+
+class GeneratorCacheTest(unittest.TestCase):
+    def test_generators(self):
+        seed = os.urandom(10)
+        expected = [elliptic_hash(str(i).encode() + seed, CURVE) for i in range(12)]
+        with tempfile.TemporaryDirectory() as directory:
+            cache = GeneratorCache(directory)
+            self.assertEqual(cache.generators(seed, 5), expected[:5])
+            self.assertEqual(cache.generators(seed, 3), expected[:3])
+            self.assertEqual(cache.generators(seed, 12), expected)
+            self.assertEqual(GeneratorCache(directory).generators(seed, 12), expected)
+            self.assertEqual(len(os.listdir(directory)), 1)
+
+    def test_invalid_file(self):
+        seed = os.urandom(10)
+        expected = [elliptic_hash(str(i).encode() + seed, CURVE) for i in range(4)]
+        with tempfile.TemporaryDirectory() as directory:
+            cache = GeneratorCache(directory)
+            with open(cache.path(seed, CURVE), "wb") as f:
+                f.write(os.urandom(200))
+            self.assertEqual(cache.generators(seed, 4), expected)
+            # Valid header, corrupted coordinates
+            with open(cache.path(seed, CURVE), "r+b") as f:
+                f.seek(-10, os.SEEK_END)
+                f.write(os.urandom(10))
+            self.assertEqual(cache.generators(seed, 4), expected)
+            self.assertEqual(GeneratorCache(directory).generators(seed, 4), expected)
@@ -0,0 +1,65 @@
+"""
+Contains the modular exponentiation and inversion used for scalars.
+They run on gmpy2 if it is installed, else on CPython ints.
+Results are always CPython ints, since fastecdsa only multiplies points by ints.
+"""
+
+import os
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+
+def egcd(a, b):
+    """Extended euclid algorithm"""
+    x0, y0, x1, y1 = 0, 1, 1, 0
+    while a != 0:
+        q, b, a = b // a, a, b % a
+        x0, x1 = x1, x0 - q * x1
+        y0, y1 = y1, y0 - q * y1
+    return (b, x0, y0)
+
+
+def _powmod_int(x: int, e: int, p: int) -> int:
+    return pow(x, e, p)
+
+
+def _invert_int(x: int, p: int) -> int:
+    g, a, _ = egcd(x % p, p)
+    if g != 1:
+        raise Exception("modular inverse does not exist")
+    return a % p
+
+
+def _powmod_gmpy2(x: int, e: int, p: int) -> int:
+    return int(gmpy2.powmod(x, e, p))
+
+
+def _invert_gmpy2(x: int, p: int) -> int:
+    try:
+        return int(gmpy2.invert(x, p))
+    except ZeroDivisionError:
+        raise Exception("modular inverse does not exist")
+
+
+powmod = _powmod_int
+invert = _invert_int
+GMPY2 = False
+
+
+def use_gmpy2(enabled: bool = True) -> bool:
+    """
+    Makes powmod and invert run on gmpy2 if enabled and gmpy2 is installed, else on CPython ints.
+    Returns whether gmpy2 is used.
+    """
+    global powmod, invert, GMPY2
+    GMPY2 = enabled and gmpy2 is not None
+    powmod = _powmod_gmpy2 if GMPY2 else _powmod_int
+    invert = _invert_gmpy2 if GMPY2 else _invert_int
+    return GMPY2
+
+
+# gmpy2 is used whenever it is installed, unless BULLETPROOFS_NO_GMPY2 is set
+use_gmpy2(not os.environ.get("BULLETPROOFS_NO_GMPY2"))
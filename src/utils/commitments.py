@@ -1,5 +1,5 @@
 from fastecdsa.point import Point
-from ..pippenger import PipSECP256k1
+from ..pippenger import MultiexpSECP256k1, PipSECP256k1
 
 
 def commitment(g, h, x, r):
@@ -10,7 +10,22 @@ def vector_commitment(g, h, a, b):
     assert len(g) == len(h) == len(a) == len(b)
     # return sum([ai*gi for ai,gi in zip(a,g)], Point(None,None,None)) \
     #         + sum([bi*hi for bi,hi in zip(b,h)], Point(None,None,None))
-    return PipSECP256k1.multiexp(g + h, a + b)
+    return MultiexpSECP256k1.multiexp(g + h, a + b)
+
+
+def bit_vector_commitment(g, h, bits):
+    """
+    Returns the vector commitment to a = bits and b = bits - 1, for bits in {0, 1},
+    with additions and subtractions of points only: g_i is added if b_i is 1 and h_i is
+    subtracted otherwise.
+    """
+    assert len(g) == len(h) == len(bits)
+    G = PipSECP256k1.G
+    ans = G.unit
+    for gi, hi, bit in zip(g, h, bits):
+        assert bit in (0, 1)
+        ans = G.mult(ans, G.lift(gi) if bit else G.neg(G.lift(hi)))
+    return G.normalize(ans)
 
 
 def _mult(a: int, g: Point) -> Point:
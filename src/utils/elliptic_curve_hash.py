@@ -2,23 +2,77 @@ from fastecdsa.point import Point
 from fastecdsa.curve import Curve
 from fastecdsa.util import mod_sqrt
 from hashlib import sha256, md5
+from multiprocessing import Pool, current_process
+from functools import partial
+from typing import List, Optional, Tuple
+import os
 
+from . import backend
 
-def elliptic_hash(msg: bytes, CURVE: Curve):
-    p = CURVE.p
+# Below this number of messages, elliptic_hash_many does not start a process pool
+PARALLEL_THRESHOLD = 256
+
+
+def _jacobi(a: int, n: int) -> int:
+    """Jacobi symbol (a/n) for odd n > 0, equal to the Legendre symbol when n is prime"""
+    a %= n
+    result = 1
+    while a:
+        while not a & 1:
+            a >>= 1
+            if n & 7 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a & 3 == 3 and n & 3 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+def _elliptic_hash_coords(msg: bytes, CURVE: Curve) -> Tuple[int, int]:
+    """Returns the affine coordinates of elliptic_hash(msg, CURVE)"""
+    p, a, b = CURVE.p, CURVE.a, CURVE.b
     i = 0
     while True:
         i += 1
         prefixed_msg = str(i).encode() + msg
-        h = sha256(prefixed_msg).hexdigest()
-        x = int(h, 16)
+        x = int.from_bytes(sha256(prefixed_msg).digest(), "big")
         if x >= p:
             continue
 
-        y_sq = (x ** 3 + CURVE.a * x + CURVE.b) % p
-        y = mod_sqrt(y_sq, p)[0]
+        y_sq = (x * x * x + a * x + b) % p
+        # Cheap quadratic residue check before the expensive square root
+        if y_sq and _jacobi(y_sq, p) != 1:
+            continue
+        if p % 4 == 3:
+            y = backend.powmod(y_sq, (p + 1) // 4, p)
+        else:
+            y = mod_sqrt(y_sq, p)[0]
+
+        b_sign = md5(prefixed_msg).digest()[-1] % 2
+        return (x, y) if b_sign else (x, (p - y) % p)
+
+
+def elliptic_hash(msg: bytes, CURVE: Curve):
+    return Point(*_elliptic_hash_coords(msg, CURVE), CURVE)
 
-        if CURVE.is_point_on_curve((x, y)):
-            b = int(md5(prefixed_msg).hexdigest(), 16) % 2
-            return Point(x, y, CURVE) if b else Point(x, p - y, CURVE)
 
+def elliptic_hash_many(
+    msgs: List[bytes], CURVE: Curve, processes: Optional[int] = None
+) -> List[Point]:
+    """
+    Returns [elliptic_hash(msg, CURVE) for msg in msgs], hashing on a pool of processes
+    (os.cpu_count() by default) when there are enough messages. Messages are hashed serially
+    in daemonic processes, such as the workers of a multiprocessing.Pool, which cannot have children.
+    """
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(msgs) < PARALLEL_THRESHOLD or current_process().daemon:
+        return [elliptic_hash(msg, CURVE) for msg in msgs]
+    with Pool(processes) as pool:
+        coords = pool.map(
+            partial(_elliptic_hash_coords, CURVE=CURVE),
+            msgs,
+            chunksize=max(1, len(msgs) // (4 * processes)),
+        )
+    # Points are built here since unpickled curves are not the CURVE object
+    return [Point(x, y, CURVE) for x, y in coords]
@@ -0,0 +1,96 @@
+"""Contains a persistent cache of generators derived by hashing to the curve"""
+
+from hashlib import sha256
+from typing import List, Optional
+import mmap
+import os
+import struct
+import tempfile
+
+from fastecdsa.curve import Curve, secp256k1
+from fastecdsa.point import Point
+
+from .elliptic_curve_hash import elliptic_hash, elliptic_hash_many
+
+MAGIC = b"BPGC"
+VERSION = 1
+# magic, version, curve name, seed digest, number of points
+HEADER = struct.Struct(">4sH16s32sQ")
+
+
+def derive_generator(i: int, seed: bytes, CURVE: Curve) -> Point:
+    """Returns the i-th generator derived from seed"""
+    return elliptic_hash(str(i).encode() + seed, CURVE)
+
+
+class GeneratorCache:
+    """
+    Cache of the generators derive_generator(i, seed, CURVE), stored in one file per (curve, seed)
+    as packed big-endian affine coordinates x || y after a versioned header.
+    Files are memory-mapped when read and are extended when more generators are requested,
+    the missing generators being derived on `processes` processes, or serially in daemonic processes.
+    """
+
+    def __init__(self, directory: str, processes: Optional[int] = None):
+        self.directory = directory
+        self.processes = processes
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, seed: bytes, CURVE: Curve) -> str:
+        """Returns the path of the file caching the generators of seed on CURVE"""
+        return os.path.join(
+            self.directory,
+            "{}-{}.gens".format(CURVE.name, sha256(seed).hexdigest()[:32]),
+        )
+
+    def generators(self, seed: bytes, count: int, CURVE: Curve = secp256k1) -> List[Point]:
+        """Returns the first count generators derived from seed, deriving and storing the missing ones"""
+        points = self._read(seed, count, CURVE)
+        if len(points) < count:
+            points += elliptic_hash_many(
+                [str(i).encode() + seed for i in range(len(points), count)],
+                CURVE,
+                self.processes,
+            )
+            self._write(seed, points, CURVE)
+        return points
+
+    def _header(self, seed: bytes, count: int, CURVE: Curve) -> bytes:
+        return HEADER.pack(
+            MAGIC, VERSION, CURVE.name.encode()[:16], sha256(seed).digest(), count
+        )
+
+    def _read(self, seed: bytes, count: int, CURVE: Curve) -> List[Point]:
+        path = self.path(seed, CURVE)
+        if not os.path.exists(path) or os.path.getsize(path) < HEADER.size:
+            return []
+        size = (CURVE.p.bit_length() + 7) // 8
+        with open(path, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as buf:
+            stored = HEADER.unpack_from(buf)[-1]
+            if buf[: HEADER.size] != self._header(seed, stored, CURVE):
+                return []
+            count = min(count, stored, (len(buf) - HEADER.size) // (2 * size))
+            points = []
+            offset = HEADER.size
+            for _ in range(count):
+                x = int.from_bytes(buf[offset : offset + size], "big")
+                y = int.from_bytes(buf[offset + size : offset + 2 * size], "big")
+                try:
+                    points.append(Point(x, y, CURVE))
+                except ValueError:
+                    # Corrupted coordinates: the generators are derived again and the file rewritten
+                    return []
+                offset += 2 * size
+            return points
+
+    def _write(self, seed: bytes, points: List[Point], CURVE: Curve):
+        # The file is replaced atomically so that concurrent readers never see a partial write
+        size = (CURVE.p.bit_length() + 7) // 8
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        with os.fdopen(fd, "wb") as f:
+            f.write(self._header(seed, len(points), CURVE))
+            for g in points:
+                f.write(g.x.to_bytes(size, "big") + g.y.to_bytes(size, "big"))
+        os.replace(tmp, self.path(seed, CURVE))
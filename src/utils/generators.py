@@ -0,0 +1,40 @@
+"""Contains the generator sets shared by provers and verifiers"""
+
+from typing import List
+
+from fastecdsa.point import Point
+
+from ..pippenger import PipSECP256k1
+
+
+class PrecomputedGenerators:
+    """
+    Set of generators gs, hs, g, h, u with fixed-base tables.
+    The tables are registered on the multiexp engine, so every multiexp
+    over these generators (vector commitments, P reconstruction, ...) uses them.
+    """
+
+    def __init__(
+        self,
+        gs: List[Point],
+        hs: List[Point],
+        g: Point,
+        h: Point,
+        u: Point,
+        pippenger=PipSECP256k1,
+    ):
+        self.gs = gs
+        self.hs = hs
+        self.g = g
+        self.h = h
+        self.u = u
+        self.pippenger = pippenger
+        self.pippenger.precompute(self.points())
+
+    def points(self) -> List[Point]:
+        """Returns all the generators of the set"""
+        return self.gs + self.hs + [self.g, self.h, self.u]
+
+    def release(self):
+        """Releases the fixed-base tables of the generators, keeping those shared with other sets"""
+        self.pippenger.release(self.points())
@@ -0,0 +1,244 @@
+"""
+Contains a vector of integers mod p stored as a NumPy array of 28 bits limbs in Montgomery form,
+on which element-wise arithmetic and inner products are vectorized. NumPy is optional.
+"""
+
+from typing import Iterable, List
+
+from .utils import ModP
+from .scalar_vector import ScalarVector, Scalar, _int
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Products of two limbs and sums of a few dozens of them fit in an int64
+LIMB_BITS = 28
+LIMB_MASK = (1 << LIMB_BITS) - 1
+# Elements are reduced below 2p before a product if they may reach MUL_BOUND * p,
+# and before a sum if they may reach ADD_BOUND * p, so that they always fit in the limbs
+MUL_BOUND = 1 << 8
+ADD_BOUND = 1 << 15
+
+# Smallest number of elements from which the range provers do their vector arithmetic on
+# LimbVector instead of ScalarVector, or None to never use it. Disabled by default: on
+# secp256k1 with 8192 elements, a product takes 2.6ms on limbs against 2.9ms on CPython ints,
+# but an inner product 2.5ms against 1.4ms and the conversions in and out 4ms and 3.6ms,
+# so that the range provers are about twice as slow on limbs at every size.
+LIMB_VECTOR_MIN_SIZE = None
+
+
+def use_limb_vectors(n: int) -> bool:
+    """Returns whether vectors of n elements should be LimbVector"""
+    return np is not None and LIMB_VECTOR_MIN_SIZE is not None and n >= LIMB_VECTOR_MIN_SIZE
+
+
+class LimbField:
+    """
+    Constants of the Montgomery arithmetic mod the odd integer p with R = 2^(28 * limbs).
+    R is at least 2^16 * p, so that the Montgomery product of a < k_a * p and b < k_b * p
+    is below 2p as long as k_a * k_b <= 2^16. The number of limbs is even, every pair of limbs
+    being converted from and to 7 bytes.
+    """
+
+    _fields = {}
+
+    def __init__(self, p: int):
+        assert p % 2 == 1
+        self.p = p
+        self.limbs = 2 * -(-(p.bit_length() + 16) // (2 * LIMB_BITS))
+        self.R = 1 << (LIMB_BITS * self.limbs)
+        self.R_inv = pow(self.R % p, p - 2, p)
+        # -p^-1 mod 2^28
+        self.p_inv = (1 << LIMB_BITS) - _inverse_mod_pow2(p, LIMB_BITS)
+        self.P = self.to_limbs([p])
+        self.R2 = self.to_limbs([self.R * self.R % p])
+        self.one = self.to_limbs([self.R % p])
+
+    @classmethod
+    def of(cls, p: int) -> "LimbField":
+        """Returns the field of p, built once"""
+        if p not in cls._fields:
+            cls._fields[p] = cls(p)
+        return cls._fields[p]
+
+    def to_limbs(self, xs: List[int]):
+        """Returns the (limbs, len(xs)) array of the limbs of the non-negative ints xs < R"""
+        pairs = self.limbs // 2
+        data = b"".join(x.to_bytes(7 * pairs, "little") for x in xs)
+        words = np.zeros((len(xs), pairs, 8), dtype=np.uint8)
+        words[:, :, :7] = np.frombuffer(data, dtype=np.uint8).reshape(len(xs), pairs, 7)
+        words = words.view("<u8").reshape(len(xs), pairs).astype(np.int64)
+        limbs = np.empty((self.limbs, len(xs)), dtype=np.int64)
+        limbs[0::2] = (words & LIMB_MASK).T
+        limbs[1::2] = (words >> LIMB_BITS).T
+        return limbs
+
+    def from_limbs(self, limbs) -> List[int]:
+        """Returns the ints of the normalized limbs"""
+        pairs = self.limbs // 2
+        words = np.ascontiguousarray((limbs[0::2] | (limbs[1::2] << LIMB_BITS)).T, "<u8")
+        data = words.view(np.uint8).reshape(-1, pairs, 8)[:, :, :7].tobytes()
+        length = 7 * pairs
+        return [
+            int.from_bytes(data[i : i + length], "little")
+            for i in range(0, len(data), length)
+        ]
+
+
+def _inverse_mod_pow2(x: int, bits: int) -> int:
+    """Returns the inverse of the odd x mod 2^bits by Newton iteration"""
+    inv = 1
+    for _ in range(bits.bit_length()):
+        inv = inv * (2 - x * inv) % (1 << bits)
+    return inv
+
+
+def _normalize(limbs):
+    """Propagates the carries of the limbs in place, until every limb is below 2^28"""
+    while True:
+        carries = limbs >> LIMB_BITS
+        if not carries.any():
+            return limbs
+        limbs &= LIMB_MASK
+        limbs[1:] += carries[:-1]
+
+
+def _montgomery(field: LimbField, a, b):
+    """
+    Returns the normalized limbs of a * b / R mod p, below 2p, for the normalized limbs a and b,
+    one of them possibly a single column broadcast to the other
+    """
+    L = field.limbs
+    t = np.zeros((2 * L + 1, max(a.shape[1], b.shape[1])), dtype=np.int64)
+    for i in range(L):
+        t[i : i + L] += a[i] * b
+    P = field.P
+    for i in range(L):
+        m = ((t[i] & LIMB_MASK) * field.p_inv) & LIMB_MASK
+        t[i : i + L] += m * P
+        t[i + 1] += t[i] >> LIMB_BITS
+    return _normalize(t[L : 2 * L].copy())
+
+
+def _column_sum(limbs) -> int:
+    """Returns the sum of the elements of the limbs"""
+    sums = limbs.sum(axis=1)
+    return sum(int(s) << (LIMB_BITS * i) for i, s in enumerate(sums))
+
+
+class LimbVector:
+    """
+    Vector of integers mod p stored as a (limbs, n) NumPy array of 28 bits limbs, in Montgomery
+    form and not fully reduced: every element is below k * p, k being tracked by the vector.
+    It has the arithmetic of ScalarVector, each operation being a few dozens of NumPy calls
+    over all the elements instead of one Python big-int operation per element.
+    """
+
+    __slots__ = ("limbs", "k", "field")
+
+    def __init__(self, limbs, k: int, field: LimbField):
+        self.limbs = limbs
+        self.k = k
+        self.field = field
+
+    @classmethod
+    def from_scalars(cls, xs: Iterable[Scalar], p: int) -> "LimbVector":
+        """Returns the vector of the ints, ModP elements or ScalarVector xs"""
+        field = LimbField.of(p)
+        xs = xs.reduced() if isinstance(xs, ScalarVector) else [_int(x) % p for x in xs]
+        # Montgomery form x * R, as the Montgomery product of x and R^2
+        return cls(_montgomery(field, field.to_limbs(xs), field.R2), 2, field)
+
+    @classmethod
+    def from_bits(cls, bits: List[int], p: int) -> "LimbVector":
+        """Returns the vector of the bits, without any multiplication"""
+        field = LimbField.of(p)
+        return cls(np.array(bits, dtype=np.int64) * field.one, 1, field)
+
+    @property
+    def p(self) -> int:
+        return self.field.p
+
+    def __len__(self):
+        return self.limbs.shape[1]
+
+    def _constant(self, y: Scalar):
+        # Limbs of the Montgomery form of the scalar y, as one column
+        return self.field.to_limbs([_int(y) * self.field.R % self.p])
+
+    def _reduce(self, k: int) -> "LimbVector":
+        # Brings the elements below 2p if they may reach k * p
+        if self.k <= k:
+            return self
+        return LimbVector(_montgomery(self.field, self.limbs, self.field.one), 2, self.field)
+
+    def __add__(self, y):
+        """Element-wise sum with a vector, or sum with a scalar"""
+        a = self._reduce(ADD_BOUND)
+        if isinstance(y, (int, ModP)):
+            return LimbVector(_normalize(a.limbs + self._constant(y)), a.k + 1, a.field)
+        b = y._reduce(ADD_BOUND)
+        return LimbVector(_normalize(a.limbs + b.limbs), a.k + b.k, a.field)
+
+    def __sub__(self, y):
+        """Element-wise difference with a vector, or difference with a scalar"""
+        if isinstance(y, (int, ModP)):
+            return self + (-_int(y) % self.p)
+        a, b = self._reduce(ADD_BOUND), y._reduce(ADD_BOUND)
+        # Adds k * p - y, which is non-negative
+        kp = a.field.to_limbs([b.k * a.p])
+        return LimbVector(_normalize(a.limbs + kp - b.limbs), a.k + b.k, a.field)
+
+    def __mul__(self, y):
+        """Hadamard product with a vector, or product with a scalar"""
+        a = self._reduce(MUL_BOUND)
+        if isinstance(y, (int, ModP)):
+            limbs = _montgomery(a.field, a.limbs, self._constant(y))
+        else:
+            limbs = _montgomery(a.field, a.limbs, y._reduce(MUL_BOUND).limbs)
+        return LimbVector(limbs, 2, a.field)
+
+    __rmul__ = __mul__
+
+    def mul_add(self, a: Scalar, y) -> "LimbVector":
+        """Returns self + a * y"""
+        return self + y * a
+
+    def inner_product(self, y) -> ModP:
+        """Inner product with y"""
+        p = self.p
+        return ModP(_column_sum((self * y).limbs) % p * self.field.R_inv % p, p)
+
+    def sum(self) -> ModP:
+        """Sum of the elements"""
+        p = self.p
+        return ModP(_column_sum(self.limbs) % p * self.field.R_inv % p, p)
+
+    def to_scalar_vector(self) -> ScalarVector:
+        """Returns the elements as a ScalarVector of ints below 2p"""
+        # Out of Montgomery form, as the Montgomery product with 1
+        one = np.zeros((self.field.limbs, 1), dtype=np.int64)
+        one[0] = 1
+        limbs = _montgomery(self.field, self._reduce(MUL_BOUND).limbs, one)
+        return ScalarVector(self.field.from_limbs(limbs), self.p)
+
+    def reduced(self) -> List[int]:
+        """Returns the elements reduced mod p"""
+        return self.to_scalar_vector().reduced()
+
+
+def to_vectors(vectors: List[ScalarVector]) -> list:
+    """
+    Returns the vectors as LimbVector if they are long enough for batched arithmetic
+    to pay off, else unchanged
+    """
+    if not vectors or not use_limb_vectors(len(vectors[0])):
+        return vectors
+    return [LimbVector.from_scalars(v, v.p) for v in vectors]
+
+
+def to_scalar_vector(v) -> ScalarVector:
+    """Returns the ScalarVector or LimbVector v as a ScalarVector"""
+    return v.to_scalar_vector() if isinstance(v, LimbVector) else v
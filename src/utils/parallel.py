@@ -0,0 +1,240 @@
+"""Contains helpers to compute independent multiexps concurrently and to split large ones across processes"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Iterable, List, Optional, Tuple
+import os
+
+from fastecdsa.curve import secp256k1
+from fastecdsa.point import Point
+
+from ..pippenger import PipSECP256k1, MultiexpSECP256k1
+from .utils import ModP
+
+CURVE = secp256k1
+
+COORD_LENGTH = 32
+SCALAR_LENGTH = 32
+
+# Number of points from which MultiexpSECP256k1 splits multiexps across processes once
+# enable_parallel_multiexp is called. Packing 256 points and scalars takes about 1% of their
+# multiexp, below that the round trip to the workers outweighs the split.
+PARALLEL_THRESHOLD = 256
+
+
+def to_coords(gs: List[Point]) -> List[Tuple[int, int]]:
+    """Returns the affine coordinates of the points gs, the identity being (0, 0)"""
+    return [(g.x, g.y) for g in gs]
+
+
+def from_coords(coords: List[Tuple[int, int]]) -> List[Point]:
+    """Returns the points of CURVE with the affine coordinates coords"""
+    return [
+        Point(x, y, CURVE) if (x, y) != (0, 0) else Point.IDENTITY_ELEMENT
+        for x, y in coords
+    ]
+
+
+def pack_points(gs: List[Point]) -> bytes:
+    """Returns the concatenated 64 bytes affine coordinates of the points gs, the identity being zeros"""
+    return b"".join(
+        g.x.to_bytes(COORD_LENGTH, "big") + g.y.to_bytes(COORD_LENGTH, "big") for g in gs
+    )
+
+
+def unpack_points(data: bytes) -> List[Point]:
+    """Returns the points packed by pack_points"""
+    step = 2 * COORD_LENGTH
+    return from_coords(
+        [
+            (
+                int.from_bytes(data[i : i + COORD_LENGTH], "big"),
+                int.from_bytes(data[i + COORD_LENGTH : i + step], "big"),
+            )
+            for i in range(0, len(data), step)
+        ]
+    )
+
+
+def pack_scalars(es: list) -> bytes:
+    """Returns the concatenated 32 bytes encodings of the ints or ModP es reduced mod q"""
+    return b"".join(
+        ((e.x if isinstance(e, ModP) else e) % CURVE.q).to_bytes(SCALAR_LENGTH, "big")
+        for e in es
+    )
+
+
+def unpack_scalars(data: bytes) -> List[int]:
+    """Returns the scalars packed by pack_scalars"""
+    return [
+        int.from_bytes(data[i : i + SCALAR_LENGTH], "big")
+        for i in range(0, len(data), SCALAR_LENGTH)
+    ]
+
+
+def init_worker_multiexp():
+    """
+    Makes MultiexpSECP256k1 compute every multiexp in a worker process: forked workers inherit
+    the parallel engine of their parent, and must not start pools of their own
+    """
+    MultiexpSECP256k1.set_parallel(None)
+
+
+def _init_worker(coords: List[Tuple[int, int]]):
+    init_worker_multiexp()
+    PipSECP256k1.precompute(from_coords(coords))
+
+
+def _multiexp_coords(coords: List[Tuple[int, int]], es: List[int]) -> Tuple[int, int]:
+    # Points are sent and returned as coordinates since unpickled curves are not the CURVE object
+    g = MultiexpSECP256k1.multiexp(from_coords(coords), es)
+    return g.x, g.y
+
+
+def _multiexp_packed(points: bytes, scalars: bytes) -> bytes:
+    # The Pippenger instance is called directly so that workers never split their range again
+    return pack_points(
+        [PipSECP256k1.multiexp(unpack_points(points), unpack_scalars(scalars))]
+    )
+
+
+def process_pool(processes: Optional[int] = None, generators=None) -> ProcessPoolExecutor:
+    """
+    Returns a process pool to compute multiexps on. If generators (a PrecomputedGenerators) is given,
+    every worker builds the fixed-base tables of its points once when it starts.
+    """
+    coords = [] if generators is None else to_coords(generators.points())
+    return ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(coords,))
+
+
+def submit_multiexps(
+    executor: Optional[Executor], args: List[Tuple[List[Point], list]]
+) -> Callable[[], List[Point]]:
+    """
+    Submits the multiexps of all the pairs (gs, es) of args to executor and returns a function
+    waiting for their results, so that the caller can compute something else in the meantime.
+    If executor is None, they are computed one after the other before returning.
+    """
+    if executor is None:
+        results = [MultiexpSECP256k1.multiexp(gs, es) for gs, es in args]
+        return lambda: results
+    if isinstance(executor, ProcessPoolExecutor):
+        futures = [
+            executor.submit(_multiexp_coords, to_coords(gs), [e % CURVE.q for e in es])
+            for gs, es in args
+        ]
+        return lambda: from_coords([future.result() for future in futures])
+    futures = [
+        executor.submit(MultiexpSECP256k1.multiexp, gs, es) for gs, es in args
+    ]
+    return lambda: [future.result() for future in futures]
+
+
+def multiexps(
+    executor: Optional[Executor], args: List[Tuple[List[Point], list]]
+) -> List[Point]:
+    """
+    Returns the multiexps of all the pairs (gs, es) of args, computed concurrently on executor,
+    or one after the other if executor is None
+    """
+    return submit_multiexps(executor, args)()
+
+
+def multiexp_streams(
+    executor: Optional[Executor], pairs_list: List[Iterable[Tuple[Point, int]]]
+) -> List[Point]:
+    """
+    Returns the multiexps of the iterables of pairs (g, e) of pairs_list, each streamed by
+    MultiexpSECP256k1.multiexp_stream, computed concurrently on executor, or one after the other
+    if executor is None. Iterators cannot be sent to worker processes, so that the pairs are
+    sent to a process pool as coordinates.
+    """
+    if executor is None:
+        return [MultiexpSECP256k1.multiexp_stream(pairs) for pairs in pairs_list]
+    if isinstance(executor, ProcessPoolExecutor):
+        futures = []
+        for pairs in pairs_list:
+            coords, es = [], []
+            for g, e in pairs:
+                coords.append((g.x, g.y))
+                es.append(e % CURVE.q)
+            futures.append(executor.submit(_multiexp_coords, coords, es))
+        return from_coords([future.result() for future in futures])
+    futures = [
+        executor.submit(MultiexpSECP256k1.multiexp_stream, pairs) for pairs in pairs_list
+    ]
+    return [future.result() for future in futures]
+
+
+class ParallelMultiexp:
+    """
+    Multiexp over CURVE splitting its points into one range per worker of a process pool.
+    Points and scalars travel packed as bytes. Points with fixed-base tables in this process
+    are computed here while the workers compute the other ranges, and the partial results are added.
+    The pool is created on the first call unless an executor is given. Calls from any other
+    process than the one which created the engine, such as forked workers, are computed there.
+    """
+
+    def __init__(
+        self, processes: Optional[int] = None, executor: Optional[ProcessPoolExecutor] = None
+    ):
+        self.processes = processes or os.cpu_count() or 1
+        self.executor = executor
+        self.pid = os.getpid()
+
+    def __call__(self, gs: List[Point], es: list) -> Point:
+        if os.getpid() != self.pid:
+            return PipSECP256k1.multiexp(gs, es)
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(
+                self.processes, initializer=init_worker_multiexp
+            )
+        tables = PipSECP256k1.tables
+        fixed_gs, fixed_es, var_gs, var_es = [], [], [], []
+        for g, e in zip(gs, es):
+            if tables and PipSECP256k1.G.key(g) in tables:
+                fixed_gs.append(g)
+                fixed_es.append(e)
+            else:
+                var_gs.append(g)
+                var_es.append(e)
+        size = max(1, -(-len(var_gs) // self.processes))
+        futures = [
+            self.executor.submit(
+                _multiexp_packed,
+                pack_points(var_gs[i : i + size]),
+                pack_scalars(var_es[i : i + size]),
+            )
+            for i in range(0, len(var_gs), size)
+        ]
+        ans = PipSECP256k1.multiexp(fixed_gs, fixed_es)
+        for future in futures:
+            ans += unpack_points(future.result())[0]
+        return ans
+
+    def close(self):
+        """Stops the worker processes"""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+def enable_parallel_multiexp(
+    processes: Optional[int] = None,
+    threshold: int = PARALLEL_THRESHOLD,
+    executor: Optional[ProcessPoolExecutor] = None,
+) -> ParallelMultiexp:
+    """
+    Makes MultiexpSECP256k1 split every multiexp of at least threshold points across
+    `processes` worker processes (os.cpu_count() by default), or the workers of executor
+    """
+    engine = ParallelMultiexp(processes, executor)
+    MultiexpSECP256k1.set_parallel(engine, threshold)
+    return engine
+
+
+def disable_parallel_multiexp():
+    """Makes MultiexpSECP256k1 compute every multiexp in this process, and stops its workers"""
+    engine = MultiexpSECP256k1.parallel
+    MultiexpSECP256k1.set_parallel(None)
+    if isinstance(engine, ParallelMultiexp):
+        engine.close()
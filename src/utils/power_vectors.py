@@ -0,0 +1,61 @@
+"""Contains the vectors of powers of the challenges shared by provers and verifiers"""
+
+from typing import List
+
+from . import backend
+from .utils import ModP
+from .scalar_vector import ScalarVector, Scalar, _int
+
+
+class RangePowers:
+    """
+    Vectors of powers of the challenges y and z of a range proof of m values of n bits,
+    each built with one multiplication per element:
+        yn: y^i for i < n*m
+        y_inv_n: y^-i for i < n*m
+        twos: 2^i for i < n
+        zs: z^(2+j) for j < m
+        z2n: z^(2+j) * 2^i at index j*n + i
+        delta: delta(y, z) of the paper, as a ModP
+    """
+
+    def __init__(self, y: Scalar, z: Scalar, n: int, m: int, p: int):
+        y, z = _int(y), _int(z)
+        self.n = n
+        self.m = m
+        self.p = p
+        self.yn = ScalarVector.powers(y, n * m, p)
+        self.y_inv_n = ScalarVector.powers(backend.invert(y, p), n * m, p)
+        self.twos = ScalarVector.powers(2, n, p)
+        self.zs = ScalarVector.powers(z, m, p) * (z * z % p)
+        z2n = []
+        for zj in self.zs.xs:
+            z2n += (self.twos * zj).xs
+        self.z2n = ScalarVector(z2n, p)
+        # (z - z^2) * <1, y^nm> - sum_{1 <= j <= m} z^(j+2) * <1, 2^n>
+        self.delta = ModP(
+            ((z - z * z) * self.yn.sum().x - z * self.zs.sum().x * (2 ** n - 1)) % p,
+            p,
+        )
+
+
+def s_vector(xs: List[Scalar], p: int) -> ScalarVector:
+    """
+    Returns the vector s of the inner-product verifier (page 15 in the paper) for the challenges xs:
+    s_i is the product of the x_j for the bits j of i set to 1, from the most significant one,
+    and of the x_j^-1 for the others. Built from s_0 with one multiplication per element,
+    s_(n-1-i) being the inverse of s_i.
+    """
+    xs = [_int(x) for x in xs]
+    log_n = len(xs)
+    n = 1 << log_n
+    s = [1] * n
+    prod = 1
+    for x in xs:
+        prod = prod * x % p
+    s[0] = backend.invert(prod, p)
+    xs_squared = [x * x % p for x in xs]
+    for i in range(1, n):
+        k = i.bit_length() - 1
+        s[i] = s[i - (1 << k)] * xs_squared[log_n - 1 - k] % p
+    return ScalarVector(s, p)
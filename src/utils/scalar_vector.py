@@ -0,0 +1,122 @@
+"""Contains a vector of integers mod p backed by plain ints"""
+
+from operator import mul
+from typing import Iterable, List, Union
+
+from .utils import ModP
+
+Scalar = Union[int, ModP]
+
+
+def _int(x: Scalar) -> int:
+    return x.x if isinstance(x, ModP) else x
+
+
+class ScalarVector:
+    """
+    Vector of integers mod p stored as a list of plain ints.
+    Additions and subtractions are not reduced, multiplications are reduced once per element
+    and inner products once in total, so that no ModP is allocated in vector code.
+    Indexing returns a reduced ModP.
+    """
+
+    __slots__ = ("xs", "p")
+
+    def __init__(self, xs: List[int], p: int):
+        self.xs = xs
+        self.p = p
+
+    @classmethod
+    def from_scalars(cls, xs: Iterable[Scalar], p: int) -> "ScalarVector":
+        """Returns the vector of the ints or ModP elements xs"""
+        if isinstance(xs, ScalarVector):
+            return xs
+        return cls([_int(x) for x in xs], p)
+
+    @classmethod
+    def powers(cls, x: Scalar, n: int, p: int) -> "ScalarVector":
+        """Returns the vector 1, x, x^2, ..., x^(n-1)"""
+        x = _int(x)
+        xs = [1] * n
+        for i in range(1, n):
+            xs[i] = xs[i - 1] * x % p
+        return cls(xs, p)
+
+    def __len__(self):
+        return len(self.xs)
+
+    def __iter__(self):
+        p = self.p
+        return (ModP(x % p, p) for x in self.xs)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return ScalarVector(self.xs[i], self.p)
+        return ModP(self.xs[i] % self.p, self.p)
+
+    def _other(self, y) -> List[int]:
+        assert len(y) == len(self.xs)
+        if isinstance(y, ScalarVector):
+            assert self.p == y.p
+            return y.xs
+        return [_int(yi) for yi in y]
+
+    def __add__(self, y):
+        """Element-wise sum with a vector, or sum with a scalar"""
+        if isinstance(y, (int, ModP)):
+            y = _int(y)
+            return ScalarVector([x + y for x in self.xs], self.p)
+        return ScalarVector([x + yi for x, yi in zip(self.xs, self._other(y))], self.p)
+
+    def __sub__(self, y):
+        """Element-wise difference with a vector, or difference with a scalar"""
+        if isinstance(y, (int, ModP)):
+            y = _int(y)
+            return ScalarVector([x - y for x in self.xs], self.p)
+        return ScalarVector([x - yi for x, yi in zip(self.xs, self._other(y))], self.p)
+
+    def __mul__(self, y):
+        """Hadamard product with a vector, or product with a scalar"""
+        p = self.p
+        if isinstance(y, (int, ModP)):
+            y = _int(y)
+            return ScalarVector([x * y % p for x in self.xs], p)
+        return ScalarVector([x * yi % p for x, yi in zip(self.xs, self._other(y))], p)
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return ScalarVector([-x for x in self.xs], self.p)
+
+    def mul_add(self, a: Scalar, y) -> "ScalarVector":
+        """Returns self + a * y, with one reduction per element"""
+        a = _int(a)
+        p = self.p
+        return ScalarVector([(x + a * yi) % p for x, yi in zip(self.xs, self._other(y))], p)
+
+    def fold(self, a: Scalar, b: Scalar) -> "ScalarVector":
+        """
+        Folds the vector in place into a * lo + b * hi, lo and hi being its two halves,
+        and returns it. The elements are reduced and the first half of the buffer is kept.
+        """
+        a, b = _int(a), _int(b)
+        p = self.p
+        xs = self.xs
+        np = len(xs) // 2
+        for i in range(np):
+            xs[i] = (a * xs[i] + b * xs[np + i]) % p
+        del xs[np:]
+        return self
+
+    def inner_product(self, y) -> ModP:
+        """Inner product with y, reduced once"""
+        return ModP(sum(map(mul, self.xs, self._other(y))) % self.p, self.p)
+
+    def sum(self) -> ModP:
+        """Sum of the elements, reduced once"""
+        return ModP(sum(self.xs) % self.p, self.p)
+
+    def reduced(self) -> List[int]:
+        """Returns the elements reduced mod p"""
+        p = self.p
+        return [x % p for x in self.xs]
@@ -0,0 +1,69 @@
+"""Contains helpers for the binary encoding of proofs"""
+
+from fastecdsa.point import Point
+
+from .utils import ModP, CURVE, BYTE_LENGTH, point_to_bytes, bytes_to_point
+
+POINT_LENGTH = BYTE_LENGTH + 1
+SCALAR_LENGTH = BYTE_LENGTH
+
+
+def encode_point(g: Point) -> bytes:
+    """Returns the 33 bytes compressed encoding of g, the identity being encoded as zeros"""
+    return point_to_bytes(g).ljust(POINT_LENGTH, b"\x00")
+
+
+def encode_scalar(x: ModP) -> bytes:
+    """Returns the 32 bytes big-endian encoding of x"""
+    return (x.x % x.p).to_bytes(SCALAR_LENGTH, "big")
+
+
+def encode_uint(x: int, length: int) -> bytes:
+    """Returns the big-endian encoding of x on length bytes"""
+    return x.to_bytes(length, "big")
+
+
+class Reader:
+    """Reads the fields of an encoded proof from a bytes-like object, without copying it"""
+
+    def __init__(self, data):
+        self.buf = memoryview(data)
+        self.offset = 0
+
+    def read(self, length: int) -> memoryview:
+        """Returns a view on the next length bytes"""
+        if self.offset + length > len(self.buf):
+            raise Exception("Invalid proof encoding")
+        view = self.buf[self.offset : self.offset + length]
+        self.offset += length
+        return view
+
+    def point(self) -> Point:
+        """Reads a point encoded with encode_point"""
+        view = self.read(POINT_LENGTH)
+        if view[0] not in (0, 2, 3) or (view[0] == 0 and any(view)):
+            raise Exception("Invalid proof encoding")
+        # x + p may fit in the encoding and decode to the point of abscissa x
+        if view[0] != 0 and int.from_bytes(view[1:], "big") >= CURVE.p:
+            raise Exception("Invalid proof encoding")
+        try:
+            return bytes_to_point(view)
+        except ValueError:
+            # x is not the abscissa of a point of the curve
+            raise Exception("Invalid proof encoding")
+
+    def scalar(self, p: int) -> ModP:
+        """Reads a scalar encoded with encode_scalar"""
+        x = int.from_bytes(self.read(SCALAR_LENGTH), "big")
+        if x >= p:
+            raise Exception("Invalid proof encoding")
+        return ModP(x, p)
+
+    def uint(self, length: int) -> int:
+        """Reads an integer encoded with encode_uint"""
+        return int.from_bytes(self.read(length), "big")
+
+    def end(self):
+        """Checks that the whole buffer has been read"""
+        if self.offset != len(self.buf):
+            raise Exception("Invalid proof encoding")
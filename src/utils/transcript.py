@@ -1,22 +1,54 @@
 import base64
+import binascii
+from hashlib import sha256
+from typing import Optional
 
-from .utils import mod_hash, point_to_b64
+from .utils import ModP, mod_hash, point_to_b64, point_to_bytes
+
+DOMAIN = b"python-bulletproofs/transcript"
 
 
 class Transcript:
     """
     Transcript class.
     Contains all parameters used to generate randomness using Fiat-Shamir
-    Separate every entity by a '&'. 
+    Separate every entity by a '&'.
+
+    Every entity is also absorbed, in binary and with a label, into a running SHA-256 state
+    from which the challenges are squeezed. In legacy mode, challenges are instead
+    the hash of the whole digest, as in proofs made before the running state was introduced.
+    If hash_seed is not set, the seed is only kept in the digest, so that a verifier
+    can recompute the challenges from Transcript() without knowing it.
     """
 
-    def __init__(self, seed=b""):
+    def __init__(self, seed=b"", legacy=False, hash_seed=True):
+        if legacy and not hash_seed:
+            raise Exception("Legacy challenges are the hash of the digest, seed included")
         self.digest = base64.b64encode(seed) + b"&"
+        self.legacy = legacy
+        if not legacy:
+            self.state = sha256(DOMAIN)
+            self._absorb(b"seed", seed if hash_seed else b"")
+
+    def _absorb(self, label: bytes, data: bytes):
+        self.state.update(
+            len(label).to_bytes(1, "big") + label + len(data).to_bytes(4, "big") + data
+        )
+
+    def fork(self):
+        """Returns a transcript continuing this one, with a digest starting with an empty seed"""
+        transcript = Transcript(legacy=self.legacy)
+        transcript.digest += self.digest
+        if not self.legacy:
+            transcript.state = self.state.copy()
+        return transcript
 
     def add_point(self, g):
         """Add an elliptic curve point to the transcript"""
         self.digest += point_to_b64(g)
         self.digest += b"&"
+        if not self.legacy:
+            self._absorb(b"point", point_to_bytes(g))
 
     def add_list_points(self, gs):
         """Add a list of elliptic curve point to the transcript"""
@@ -27,7 +59,31 @@ class Transcript:
         """Add a number to the transcript"""
         self.digest += str(x).encode()
         self.digest += b"&"
+        if not self.legacy:
+            x = x.x if isinstance(x, ModP) else x
+            self._absorb(b"number", x.to_bytes((x.bit_length() + 7) // 8, "big"))
 
     def get_modp(self, p):
         """Generate a number as the hash of the digest"""
-        return mod_hash(self.digest, p)
+        if self.legacy:
+            return mod_hash(self.digest, p)
+        state = self.state.copy()
+        state.update(b"challenge")
+        i = 0
+        while True:
+            i += 1
+            h = state.copy()
+            h.update(i.to_bytes(4, "big"))
+            x = int.from_bytes(h.digest(), "big") % 2 ** p.bit_length()
+            if 0 < x < p:
+                return ModP(x, p)
+
+
+def seed_of(digest: bytes) -> Optional[bytes]:
+    """Returns the seed a digest starts with, or None if it is not canonically encoded"""
+    encoded = digest.split(b"&")[0]
+    try:
+        seed = base64.b64decode(encoded, validate=True)
+    except binascii.Error:
+        return None
+    return seed if base64.b64encode(seed) == encoded else None
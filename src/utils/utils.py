@@ -3,24 +3,19 @@
 from hashlib import sha256
 from typing import List
 import base64
+import secrets
 
 from fastecdsa.point import Point
 from fastecdsa.curve import secp256k1
 from fastecdsa.util import mod_sqrt
 
+from . import backend
+from .backend import egcd
+
 CURVE = secp256k1
 BYTE_LENGTH = CURVE.q.bit_length() // 8
 
 
-def egcd(a, b):
-    """Extended euclid algorithm"""
-    if a == 0:
-        return (b, 0, 1)
-    else:
-        g, y, x = egcd(b % a, a)
-        return (g, x - (b // a) * y, y)
-
-
 class ModP:
     """Class representing an integer mod p"""
 
@@ -55,7 +50,7 @@ class ModP:
         return -(self - y)
 
     def __pow__(self, n):
-        return ModP(pow(self.x, n, self.p), self.p)
+        return ModP(backend.powmod(self.x, n, self.p), self.p)
 
     def __mod__(self, other):
         return self.x % other
@@ -65,11 +60,7 @@ class ModP:
 
     def inv(self):
         """Returns the modular inverse"""
-        g, a, _ = egcd(self.x, self.p)
-        if g != 1:
-            raise Exception("modular inverse does not exist")
-        else:
-            return ModP(a % self.p, self.p)
+        return ModP(backend.invert(self.x, self.p), self.p)
 
     def __eq__(self, y):
         return (self.p == y.p) and (self.x % self.p == y.x % self.p)
@@ -81,14 +72,34 @@ class ModP:
         return str(self.x)
 
 
+def batch_inverse(xs: List[ModP]) -> List[ModP]:
+    """
+    Returns the modular inverses of all the elements of xs,
+    using a single inversion and 3(n-1) multiplications (Montgomery's trick)
+    """
+    if not xs:
+        return []
+    p = xs[0].p
+    prefix = []
+    acc = 1
+    for x in xs:
+        prefix.append(acc)
+        acc = acc * x.x % p
+    inv = ModP(acc, p).inv().x
+    res = [None] * len(xs)
+    for i in range(len(xs) - 1, -1, -1):
+        res[i] = ModP(inv * prefix[i] % p, p)
+        inv = inv * xs[i].x % p
+    return res
+
+
 def mod_hash(msg: bytes, p: int, non_zero: bool = True) -> ModP:
     """Takes a message and a prime and returns a hash in ModP"""
     i = 0
     while True:
         i += 1
         prefixed_msg = str(i).encode() + msg
-        h = sha256(prefixed_msg).hexdigest()
-        x = int(h, 16) % 2 ** p.bit_length()
+        x = int.from_bytes(sha256(prefixed_msg).digest(), "big") % 2 ** p.bit_length()
         if x >= p:
             continue
         elif non_zero and x == 0:
@@ -97,6 +108,11 @@ def mod_hash(msg: bytes, p: int, non_zero: bool = True) -> ModP:
             return ModP(x, p)
 
 
+def random_modp(p: int) -> ModP:
+    """Returns a uniformly random non-zero element of Z_p"""
+    return ModP(secrets.randbelow(p - 1) + 1, p)
+
+
 def point_to_bytes(g: Point) -> bytes:
     """Takes an EC point and returns the compressed bytes representation"""
     if g == Point.IDENTITY_ELEMENT:
@@ -118,7 +134,7 @@ def b64_to_point(s: bytes) -> Point:
 
 def bytes_to_point(b: bytes) -> Point:
     """Takes a compressed bytes representation and returns the corresponding point"""
-    if b == 0:
+    if b[0] == 0:
         return Point.IDENTITY_ELEMENT
     p = CURVE.p
     yp, x_enc = b[0], b[1:]
@@ -134,4 +150,5 @@ def bytes_to_point(b: bytes) -> Point:
 def inner_product(a: List[ModP], b: List[ModP]) -> ModP:
     """Inner-product of vectors in Z_p"""
     assert len(a) == len(b)
-    return sum([ai * bi for ai, bi in zip(a, b)], ModP(0, a[0].p))
+    p = a[0].p
+    return ModP(sum([ai.x * bi.x for ai, bi in zip(a, b)]) % p, p)